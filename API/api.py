@@ -1,18 +1,30 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+import json
 import os
+import re
 import sqlite3
 import sys
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
 
 # ---------------- CLI HELPERS ----------------
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from cli_helper import setup_cli, check_help
 
 # ---------------- SEMANTIC ENGINE ----------------
-from API.semantic_engine import semantic_search, _model, _loading
+from API.semantic_engine import semantic_search, semantic_search_batch, validate_filters, _model, _loading
+from API.models import BatchSearchRequest, BookBatchRequest, CLASS_PREFIX_PATTERN
+from API.recommendations import similar_books
+from API import suggest as suggest_index
+
+# ---------------- HTTP CACHING ----------------
+from API.http_cache import ETagMiddleware
+
+# ---------------- METRICS ----------------
+from API.metrics import MetricsMiddleware, metrics_response, stage
 
 # ---------------- CLI CHECK ----------------
 check_help("FastAPI application for Library Book Finder")
@@ -25,38 +37,153 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DB_PATH = os.getenv("BOOK_DB_PATH", str(BASE_DIR / "Database" / "db.sqlite3"))
 
 # ---------------- DB ----------------
-def get_db_connection():
+def get_db_connection(check_same_thread: bool = True):
     if not os.path.exists(DB_PATH):
         raise HTTPException(status_code=500, detail="Database file not found")
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     return conn
 
-def fetch_books_by_acc_nos(acc_nos: List[int]) -> Dict[int, Dict]:
+# Column lists for book rows. "tile" is what BookGrid/BookTile render: no
+# long description (just enough for the tile's 100-char excerpt).
+BOOK_PROJECTIONS = {
+    "full": "*",
+    "tile": "Acc_No, Title, Author_Editor, Year, ISBN, image_url, "
+            "SUBSTR(description, 1, 120) AS description",
+}
+
+def fetch_books_by_acc_nos(acc_nos: List[int], projection: str = "full") -> Dict[int, Dict]:
+    """
+    One query for many Acc_Nos. The ids are bound as a single JSON array
+    and expanded with json_each, so the SQL text is identical for any batch
+    size: sqlite3 reuses the prepared statement from its cache, and large
+    batches never hit SQLite's bound-variable limit.
+    """
     if not acc_nos:
         return {}
 
-    placeholders = ",".join("?" for _ in acc_nos)
-    query = f"SELECT * FROM books WHERE Acc_No IN ({placeholders})"
+    query = f"""
+        SELECT {BOOK_PROJECTIONS[projection]}
+        FROM books
+        WHERE Acc_No IN (SELECT value FROM json_each(?))
+    """
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(query, acc_nos)
-    rows = cur.fetchall()
-    conn.close()
+    with stage("hydrate"):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, (json.dumps([int(a) for a in acc_nos]),))
+        rows = cur.fetchall()
+        conn.close()
+
+        return {row["Acc_No"]: dict(row) for row in rows}
+
+def build_semantic_payload(semantic: Dict) -> Dict:
+    acc_nos = list({r["acc_no"] for r in semantic["results"]})
+    books = fetch_books_by_acc_nos(acc_nos)
+
+    results = []
+    for r in semantic["results"]:
+        book = books.get(r["acc_no"], {})
+        results.append({
+            **book,
+            "similarity": r["similarity"],
+            "matches": [{
+                "field": r["field"],
+                "text": r["text"],
+                "score": r["similarity"]
+            }]
+        })
+
+    return {
+        "results": results,
+        "final_threshold": semantic["final_threshold"],
+        "threshold_reduced": semantic["threshold_reduced"]
+    }
+
+def hydrate_semantic_results(semantic: Dict) -> JSONResponse:
+    payload = build_semantic_payload(semantic)
+    with stage("serialize"):
+        # Rendered here (not by FastAPI after return) so the JSON encode is timed
+        return JSONResponse(payload)
+
+# ---------------- ISBN LOOKUP ----------------
+ISBN_PATTERN = re.compile(r"^(?:\d{9}[\dXx]|\d{13})$")
+
+def normalize_isbn(value: str) -> str:
+    return value.strip().replace("-", "").replace(" ", "")
+
+def fetch_books_by_isbns(isbns: List[str]) -> Dict[str, Dict]:
+    """
+    One query for many ISBNs. The WHERE expression matches
+    idx_books_isbn_norm (Database/SQLite3.py), so each lookup is an index
+    probe rather than a table scan.
+    """
+    if not isbns:
+        return {}
 
-    return {row["Acc_No"]: dict(row) for row in rows}
+    placeholders = ",".join("?" for _ in isbns)
+    query = f"""
+        SELECT *, REPLACE(ISBN, '-', '') AS _isbn_norm
+        FROM books
+        WHERE REPLACE(ISBN, '-', '') IN ({placeholders})
+    """
+
+    with stage("hydrate"):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, isbns)
+        rows = cur.fetchall()
+        conn.close()
+
+    found = {}
+    for row in rows:
+        book = dict(row)
+        found.setdefault(str(book.pop("_isbn_norm")), book)
+    return found
+
+# ---------------- SEARCH FILTERS ----------------
+def build_filters(year_min=None, year_max=None, class_prefix=None, publisher=None) -> Optional[Dict]:
+    filters = {
+        "year_min": year_min,
+        "year_max": year_max,
+        "class_prefix": class_prefix,
+        "publisher": publisher,
+    }
+    return {k: v for k, v in filters.items() if v is not None} or None
+
+def search_filters(
+    year_min: Optional[int] = Query(None, ge=1000, le=2100),
+    year_max: Optional[int] = Query(None, ge=1000, le=2100),
+    class_prefix: Optional[str] = Query(None, max_length=16, pattern=CLASS_PREFIX_PATTERN),
+    publisher: Optional[str] = Query(None, min_length=2, max_length=100),
+) -> Optional[Dict]:
+    return build_filters(year_min, year_max, class_prefix, publisher)
+
+def run_semantic_search(query: str, allowed_fields=None, filters: Optional[Dict] = None) -> Dict:
+    try:
+        return semantic_search(query, allowed_fields=allowed_fields, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ---------------- MIDDLEWARE ----------------
+# Added first so CORS wraps it and 304 responses still carry CORS headers
+app.add_middleware(ETagMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
-# ---------------- ROOT ----------------
+# ---------------- STARTUP ----------------
+@app.on_event("startup")
+def build_suggest_index():
+    # No-op if gunicorn already built it in the master before forking
+    suggest_index.ensure_built(DB_PATH)
+
 # ---------------- ROOT ----------------
 # Removed to serve frontend at root
 # @app.get("/")
@@ -72,20 +199,77 @@ def health():
     }
 
 # ---------------- BOOK LIST ----------------
+BOOK_STREAM_FETCH = 500  # rows per fetchmany() when streaming NDJSON
+
 @app.get("/books")
-def get_books(limit: int = Query(1000, ge=1, le=5000)):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT *
+def get_books(
+    limit: int = Query(1000, ge=1, le=5000),
+    projection: Literal["full", "tile"] = "full",
+    after: Optional[int] = Query(None, ge=-(2 ** 63), le=2 ** 63 - 1,
+                                 description="Keyset cursor: return books with Acc_No > after"),
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
+    """
+    Catalogue listing in Acc_No order. Pages are keyset-paginated: pass the
+    previous page's `next_after` as `after`, which is an index seek on the
+    primary key, so every page costs the same however deep it is (OFFSET
+    would rescan all earlier rows). `format=ndjson` streams one book per
+    line as rows are fetched instead of building one JSON body.
+    """
+    query = f"""
+        SELECT {BOOK_PROJECTIONS[projection]}
         FROM books
         WHERE Title IS NOT NULL
           AND Author_Editor IS NOT NULL
+          AND Acc_No > ?
+        ORDER BY Acc_No
         LIMIT ?
-    """, (limit,))
+    """
+    # Acc_No is INTEGER PRIMARY KEY (the rowid), so no cursor means "> -inf"
+    params = (after if after is not None else -(2 ** 63), limit)
+
+    if output == "ndjson":
+        # Missing DB is still a 500 here, before the 200 headers go out
+        if not os.path.exists(DB_PATH):
+            raise HTTPException(status_code=500, detail="Database file not found")
+
+        def stream():
+            # Opened here, not before StreamingResponse: a generator that
+            # never starts would never reach its finally and close it.
+            # It runs on the threadpool, one next() at a time.
+            conn = get_db_connection(check_same_thread=False)
+            try:
+                cur = conn.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(BOOK_STREAM_FETCH)
+                    if not rows:
+                        break
+                    yield "".join(json.dumps(dict(r), default=str) + "\n" for r in rows).encode("utf-8")
+            finally:
+                conn.close()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(query, params)
     rows = [dict(r) for r in cur.fetchall()]
     conn.close()
-    return {"count": len(rows), "data": rows}
+    next_after = rows[-1]["Acc_No"] if len(rows) == limit else None
+    return {"count": len(rows), "data": rows, "next_after": next_after}
+
+# ---------------- BULK HYDRATION ----------------
+@app.post("/books/batch")
+def get_books_batch(request: BookBatchRequest):
+    """
+    Many books by Acc_No in one round trip and one prepared query, returned
+    in request order. Unknown Acc_Nos are listed in `missing`.
+    """
+    acc_nos = list(dict.fromkeys(request.acc_nos))
+    books = fetch_books_by_acc_nos(acc_nos, request.projection)
+    data = [books[a] for a in acc_nos if a in books]
+    missing = [a for a in acc_nos if a not in books]
+    return {"count": len(data), "data": data, "missing": missing}
 
 # ---------------- BOOK BY ACC_NO (NEW, FOR MODAL) ----------------
 @app.get("/books/id/{acc_no}")
@@ -101,6 +285,25 @@ def get_book_by_id(acc_no: int):
 
     return dict(row)
 
+# ---------------- SIMILAR BOOKS ("MORE LIKE THIS") ----------------
+@app.get("/books/id/{acc_no}/similar")
+def get_similar_books(acc_no: int, limit: int = Query(10, ge=1, le=50)):
+    try:
+        neighbours = similar_books(acc_no, limit)
+    except LookupError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if neighbours is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    books = fetch_books_by_acc_nos([n for n, _ in neighbours])
+    data = [
+        {**books[n], "similarity": score}
+        for n, score in neighbours
+        if n in books
+    ]
+    return {"acc_no": acc_no, "count": len(data), "data": data}
+
 # ---------------- RANDOM BOOKS (NEW) ----------------
 @app.get("/books/random")
 def random_books(limit: int = Query(8, ge=1, le=20)):
@@ -139,7 +342,10 @@ def search_isbn(isbn: str = Query(..., min_length=3)):
 
 # ---------------- UNIFIED SEARCH (NEW) ----------------
 @app.get("/search/unified")
-def unified_search(q: str = Query(..., min_length=2, max_length=200)):
+def unified_search(
+    q: str = Query(..., min_length=2, max_length=200),
+    filters: Optional[Dict] = Depends(search_filters),
+):
     q = q.strip()
 
     # fast ISBN shortcut
@@ -149,64 +355,107 @@ def unified_search(q: str = Query(..., min_length=2, max_length=200)):
         except HTTPException:
             pass
 
-    return semantic_search(q)
+    return run_semantic_search(q, filters=filters)
+
+# ---------------- BATCH SEARCH (READING LISTS) ----------------
+@app.post("/search/batch")
+def batch_search(request: BatchSearchRequest):
+    """
+    Many queries in one request, streamed back as NDJSON (one line per
+    query, tagged with its input index). ISBN-looking lines are resolved
+    first with a single indexed lookup; everything else (including ISBNs
+    not in the catalogue) is encoded in one model batch and scored with one
+    matrix-matrix product per block of vectors.
+    """
+    filters = build_filters(request.year_min, request.year_max,
+                            request.class_prefix, request.publisher)
+    # semantic_search_batch is a generator: check filters here, so a bad
+    # filter is a 400 like on the GET endpoints, not an error line in a 200
+    if filters:
+        try:
+            validate_filters(filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    allowed_fields = ["title"] if request.mode == "title" else None
+    queries = [q.strip()[:200] for q in request.queries]
+
+    isbn_queries = {
+        i: normalize_isbn(q) for i, q in enumerate(queries)
+        if ISBN_PATTERN.match(normalize_isbn(q))
+    }
+    isbn_hits = fetch_books_by_isbns(sorted(set(isbn_queries.values())))
+
+    # Every line has the same envelope: index, query, kind, count
+    def line(i: int, kind: str, count: int, **payload) -> bytes:
+        record = {"index": i, "query": queries[i], "kind": kind, "count": count, **payload}
+        return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+    def stream():
+        semantic_indices = []
+        for i, q in enumerate(queries):
+            book = isbn_hits.get(isbn_queries.get(i))
+            if book is not None:
+                yield line(i, "isbn", 1, data=[book])
+            else:
+                semantic_indices.append(i)
+
+        if not semantic_indices:
+            return
+
+        pending = set(semantic_indices)
+        try:
+            batch = semantic_search_batch(
+                [queries[i] for i in semantic_indices],
+                allowed_fields=allowed_fields,
+                filters=filters,
+            )
+            for j, semantic in batch:
+                i = semantic_indices[j]
+                payload = build_semantic_payload(semantic)
+                pending.discard(i)
+                yield line(i, "semantic", len(payload["results"]), **payload)
+        except ValueError as e:
+            # One error line per query left unanswered, so each can be matched
+            for i in sorted(pending):
+                yield line(i, "error", 0, error=str(e))
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 # ---------------- TITLE SEMANTIC SEARCH ----------------
 @app.get("/search/title")
-def search_title(query: str = Query(..., min_length=3, max_length=200)):
-    semantic = semantic_search(query, allowed_fields=["title"])
-    acc_nos = list({r["acc_no"] for r in semantic["results"]})
-    books = fetch_books_by_acc_nos(acc_nos)
-
-    results = []
-    for r in semantic["results"]:
-        book = books.get(r["acc_no"], {})
-        results.append({
-            **book,
-            "similarity": r["similarity"],
-            "matches": [{
-                "field": r["field"],
-                "text": r["text"],
-                "score": r["similarity"]
-            }]
-        })
-
-    return {
-        "results": results,
-        "final_threshold": semantic["final_threshold"],
-        "threshold_reduced": semantic["threshold_reduced"]
-    }
+def search_title(
+    query: str = Query(..., min_length=3, max_length=200),
+    filters: Optional[Dict] = Depends(search_filters),
+):
+    semantic = run_semantic_search(query, allowed_fields=["title"], filters=filters)
+    return hydrate_semantic_results(semantic)
 
 # ---------------- FULL SEMANTIC SEARCH ----------------
 @app.get("/search/semantic")
-def search_semantic(query: str = Query(..., min_length=3, max_length=200)):
-    semantic = semantic_search(query)
-    acc_nos = list({r["acc_no"] for r in semantic["results"]})
-    books = fetch_books_by_acc_nos(acc_nos)
-
-    results = []
-    for r in semantic["results"]:
-        book = books.get(r["acc_no"], {})
-        results.append({
-            **book,
-            "similarity": r["similarity"],
-            "matches": [{
-                "field": r["field"],
-                "text": r["text"],
-                "score": r["similarity"]
-            }]
-        })
-
-    return {
-        "results": results,
-        "final_threshold": semantic["final_threshold"],
-        "threshold_reduced": semantic["threshold_reduced"]
-    }
+def search_semantic(
+    query: str = Query(..., min_length=3, max_length=200),
+    filters: Optional[Dict] = Depends(search_filters),
+):
+    semantic = run_semantic_search(query, filters=filters)
+    return hydrate_semantic_results(semantic)
+
+# ---------------- TYPEAHEAD SUGGESTIONS ----------------
+@app.get("/suggest")
+def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=suggest_index.MAX_SUGGESTIONS),
+):
+    if not suggest_index.ensure_built(DB_PATH):
+        raise HTTPException(status_code=500, detail="Database file not found")
+    return {"prefix": prefix, "suggestions": suggest_index.suggest(prefix, limit)}
 
 # ---------------- RAW SEMANTIC SEARCH ----------------
 @app.get("/search/raw")
-def search_raw(query: str = Query(..., min_length=3, max_length=200)):
-    return semantic_search(query)
+def search_raw(
+    query: str = Query(..., min_length=3, max_length=200),
+    filters: Optional[Dict] = Depends(search_filters),
+):
+    return run_semantic_search(query, filters=filters)
 
 # ---------------- MODEL INFO ----------------
 @app.get("/model-info")
@@ -225,6 +474,11 @@ def search_status():
         "loading": _loading,
     }
 
+# ---------------- METRICS (PROMETHEUS) ----------------
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
 # ---------------- FRONTEND SERVING ----------------
 frontend_dist = BASE_DIR / "frontend" / "dist"
 if frontend_dist.exists():
@@ -0,0 +1,128 @@
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from .metrics import inc
+from . import semantic_engine
+from . import suggest as suggest_index
+from .utils import stat_key
+
+# ================= CONFIG =================
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Read-only endpoints whose response depends only on the request and the
+# data version behind it (see data_version).
+CACHEABLE_PREFIXES = (
+    "/books/id/",
+    "/search/isbn",
+    "/search/title",
+    "/search/semantic",
+    "/suggest",
+)
+# Answered from data loaded once per process, not from the files on disk
+ENGINE_PREFIXES = ("/search/title", "/search/semantic")
+SUGGEST_PREFIX = "/suggest"
+
+# Bump on releases that change response bodies (shape, ranking, defaults)
+# without touching the data, so clients and CDNs stop revalidating old
+# bodies. A deploy's commit (APP_RELEASE, or Render's RENDER_GIT_COMMIT)
+# is folded in too, so every deploy invalidates on its own.
+APP_VERSION = "2026.10.2"
+
+CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+CACHE_CONTROL = (
+    f"public, max-age={CACHE_MAX_AGE}, stale-while-revalidate={CACHE_MAX_AGE}"
+)
+
+
+def _db_path() -> Path:
+    return Path(os.getenv("BOOK_DB_PATH", str(BASE_DIR / "Database" / "db.sqlite3")))
+
+
+def _code_key() -> str:
+    """App release plus the engine settings that shape search responses."""
+    release = os.getenv("APP_RELEASE") or os.getenv("RENDER_GIT_COMMIT", "")
+    return (
+        f"app:{APP_VERSION}:{release}|model:{semantic_engine.MODEL_NAME}"
+        f"|thresholds:{semantic_engine.DEFAULT_THRESHOLD}:{semantic_engine.MIN_THRESHOLD}"
+        f":{semantic_engine.THRESHOLD_STEP}|top_k:{semantic_engine.SEARCH_TOP_K}"
+    )
+
+
+# ================= DATA VERSION =================
+
+@lru_cache(maxsize=32)
+def _digest(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def data_version(path: str) -> str:
+    """
+    Short hash identifying the data behind `path`, and the code serving it.
+
+    DB reads (/books/id/, /search/isbn, hydrating search hits) see the live
+    file, so that part is its current stat. Search scores come from the
+    embeddings the engine loaded and /suggest from the index built at
+    startup, so those parts are the versions recorded at load time: a
+    rebuild on disk changes their ETags only once the process has reloaded
+    the data. Only a few stat() calls per request; the hash is memoized.
+    """
+    parts = [_code_key()]
+    if path.startswith(SUGGEST_PREFIX):
+        parts.append(suggest_index.loaded_db_key(_db_path()))
+    else:
+        parts.append(stat_key(_db_path()))
+        if path.startswith(ENGINE_PREFIXES):
+            parts.append(semantic_engine.loaded_artifacts_key())
+    return _digest("|".join(parts))
+
+
+def make_etag(path: str, query: str, version: str) -> str:
+    digest = hashlib.sha1(f"{version}\n{path}\n{query}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # No "*" shortcut: this runs before the endpoint, so "*" would turn
+    # a 404 (e.g. an unknown /books/id/) into a 304
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    candidates = (c.strip() for c in header.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+# ================= MIDDLEWARE =================
+
+class ETagMiddleware(BaseHTTPMiddleware):
+    """
+    Strong ETags + Cache-Control for the cacheable read endpoints.
+
+    The ETag is derived from the request (path + sorted query string) and
+    the data version, not from the response body, so a matching
+    If-None-Match is answered with 304 before the endpoint runs any DB
+    query or model inference.
+    """
+
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        if request.method not in ("GET", "HEAD") or not path.startswith(CACHEABLE_PREFIXES):
+            return await call_next(request)
+
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        etag = make_etag(path, query, data_version(path))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            inc("http_cache_not_modified_total")
+            return Response(status_code=304, headers=headers)
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.update(headers)
+        return response
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+# ================= CONFIG =================
+
+# Set METRICS_ENABLED=0 to turn every stage() / inc() into a no-op.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Seconds; tuned for a hot path that ranges from ~100µs (SQLite lookup)
+# to a few seconds (cold model encode on a shared CPU).
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# ================= PRIMITIVES =================
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms = {}   # (metric, label_value) -> Histogram
+_counters = {}     # metric -> float
+_gauges = {}       # metric -> float
+
+# Per-request list of (stage, seconds) for the Server-Timing header
+_request_timings = ContextVar("request_timings", default=None)
+
+
+def observe(metric: str, label: str, seconds: float):
+    with _lock:
+        hist = _histograms.get((metric, label))
+        if hist is None:
+            hist = _histograms[(metric, label)] = Histogram()
+        hist.observe(seconds)
+
+
+def inc(metric: str, value: float = 1.0):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[metric] = _counters.get(metric, 0.0) + value
+
+
+def set_gauge(metric: str, value: float):
+    _gauges[metric] = float(value)
+
+
+@contextmanager
+def _timed_stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_duration_seconds", name, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def stage(name: str):
+    """Time a block of the hot path: `with stage("encode"): ...`"""
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return _timed_stage(name)
+
+# ================= PROCESS GAUGES =================
+
+def _process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _mapped_file_bytes(suffix: str):
+    """(size, resident) bytes of file mappings whose path ends with `suffix`."""
+    size = rss = 0
+    try:
+        with open("/proc/self/smaps", "r") as f:
+            current = False
+            for line in f:
+                first = line.split(None, 1)[0]
+                if "-" in first and not first.endswith(":"):
+                    # Mapping header: "start-end perms offset dev inode path"
+                    current = line.rstrip().endswith(suffix)
+                elif current and first == "Size:":
+                    size += int(line.split()[1]) * 1024
+                elif current and first == "Rss:":
+                    rss += int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return size, rss
+
+# ================= EXPOSITION =================
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render() -> str:
+    """Prometheus text exposition (format 0.0.4)."""
+    lines = []
+
+    with _lock:
+        histograms = {k: (list(h.counts), h.total, h.count) for k, h in _histograms.items()}
+        counters = dict(_counters)
+    gauges = dict(_gauges)
+
+    label_names = {
+        "stage_duration_seconds": "stage",
+        "http_request_duration_seconds": "route",
+    }
+    for metric in sorted({m for m, _ in histograms}):
+        name = f"bookfinder_{metric}"
+        label = label_names.get(metric, "label")
+        lines.append(f"# TYPE {name} histogram")
+        for (m, value), (counts, total, count) in sorted(histograms.items()):
+            if m != metric:
+                continue
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{label}="{value}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label}="{value}"}} {total!r}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {count}')
+
+    for metric, value in sorted(counters.items()):
+        lines.append(f"# TYPE bookfinder_{metric} counter")
+        lines.append(f"bookfinder_{metric} {_fmt(value)}")
+
+    # Process gauges are read only at scrape time, never on the request path
+    gauges["process_resident_memory_bytes"] = _process_rss_bytes()
+    vec_size, vec_rss = _mapped_file_bytes("vectors.npy")
+    gauges["vectors_mapped_bytes"] = vec_size
+    gauges["vectors_resident_bytes"] = vec_rss
+
+    for metric, value in sorted(gauges.items()):
+        lines.append(f"# TYPE bookfinder_{metric} gauge")
+        lines.append(f"bookfinder_{metric} {_fmt(value)}")
+
+    return "\n".join(lines) + "\n"
+
+# ================= MIDDLEWARE =================
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Times every request, labels it by route template (not raw path, to keep
+    cardinality bounded) and reports the collected stages in a
+    `Server-Timing` header.
+    """
+
+    async def dispatch(self, request, call_next):
+        if not METRICS_ENABLED:
+            return await call_next(request)
+
+        timings = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_timings.reset(token)
+        elapsed = time.perf_counter() - start
+
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        observe("http_request_duration_seconds", route_path, elapsed)
+
+        entries = [f"{name};dur={secs * 1000:.3f}" for name, secs in timings]
+        entries.append(f"total;dur={elapsed * 1000:.3f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+        return response
+
+
+def metrics_response() -> Response:
+    return Response(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+# Dewey class prefix: '0', '00', '005', '005.', '005.13'. Decimals only
+# after a full three-digit class ('5.1' is ambiguous: 5xx or 005.1?)
+CLASS_PREFIX_PATTERN = r"^(\d{1,2}|\d{3}(\.\d*)?)$"
 
 class SemanticMatch(BaseModel):
     acc_no: int
@@ -16,3 +20,15 @@ class ModelInfo(BaseModel):
     model_name: str
     vector_dimension: int
     default_threshold: float
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=200)
+    mode: Literal["semantic", "title"] = "semantic"
+    year_min: Optional[int] = Field(None, ge=1000, le=2100)
+    year_max: Optional[int] = Field(None, ge=1000, le=2100)
+    class_prefix: Optional[str] = Field(None, max_length=16, pattern=CLASS_PREFIX_PATTERN)
+    publisher: Optional[str] = Field(None, min_length=2, max_length=100)
+
+class BookBatchRequest(BaseModel):
+    acc_nos: List[int] = Field(..., min_length=1, max_length=1000)
+    projection: Literal["full", "tile"] = "full"
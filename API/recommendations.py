@@ -0,0 +1,55 @@
+import threading
+
+import numpy as np
+
+from .semantic_engine import EMBEDDINGS_DIR
+from .metrics import stage
+
+# ================= CONFIG =================
+
+NEIGHBOURS_PATH = EMBEDDINGS_DIR / "neighbours.npz"
+
+# ================= LAZY-LOADED ARRAYS =================
+# Precomputed by scripts/build_embeddings.py: no model, no vector scan at
+# request time, and independent of the semantic engine being loaded.
+
+_acc_nos = None      # int32[books], sorted
+_neighbours = None   # int32[books, top_n], -1 padded
+_scores = None       # float16[books, top_n]
+_lock = threading.Lock()
+
+
+def _ensure_loaded() -> bool:
+    global _acc_nos, _neighbours, _scores
+
+    if _acc_nos is not None:
+        return True
+
+    with _lock:
+        if _acc_nos is not None:
+            return True
+        if not NEIGHBOURS_PATH.exists():
+            return False
+        with np.load(NEIGHBOURS_PATH, allow_pickle=False) as data:
+            _neighbours = data["neighbours"]
+            _scores = data["scores"]
+            _acc_nos = data["acc_nos"]
+        return True
+
+
+def similar_books(acc_no: int, limit: int):
+    """
+    [(acc_no, similarity), ...] for a book, best first.
+    None if the book has no neighbour list; raises LookupError if the
+    neighbour lists have not been built.
+    """
+    if not _ensure_loaded():
+        raise LookupError("Recommendations not built: rebuild embeddings")
+
+    with stage("neighbours"):
+        pos = int(np.searchsorted(_acc_nos, acc_no))
+        if pos >= len(_acc_nos) or _acc_nos[pos] != acc_no:
+            return None
+        row = _neighbours[pos, :limit]
+        valid = row >= 0
+        return list(zip(row[valid].tolist(), _scores[pos, :limit][valid].astype(float).tolist()))
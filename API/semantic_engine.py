@@ -1,18 +1,27 @@
 import json
+import os
 import sys
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 
-from .utils import normalize_query, cosine_similarity
+from .utils import (
+    normalize_query, cosine_similarity, cosine_similarity_batch, dewey_prefix_range,
+    stat_key, UNKNOWN_YEAR,
+)
+from .metrics import stage, inc, set_gauge
 
 # ================= CONFIG =================
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-EMBEDDINGS_DIR = BASE_DIR / "embeddings"
+EMBEDDINGS_DIR = Path(os.getenv("BOOK_EMBEDDINGS_DIR", str(BASE_DIR / "embeddings")))
 
 VECTORS_PATH = EMBEDDINGS_DIR / "vectors.npy"
 METADATA_PATH = EMBEDDINGS_DIR / "metadata.json"
+MANIFEST_PATH = EMBEDDINGS_DIR / "manifest.json"
+ATTRIBUTES_PATH = EMBEDDINGS_DIR / "attributes.npz"
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 VECTOR_DIM = 384
@@ -21,18 +30,61 @@ DEFAULT_THRESHOLD = 0.60
 MIN_THRESHOLD = 0.45
 THRESHOLD_STEP = 0.05
 
+# When a filter keeps less than this fraction of a segment, gather and score
+# only the surviving rows; otherwise score the whole (contiguous) segment.
+FILTER_GATHER_FRACTION = 0.25
+
+# Blocked scoring: segments are scored in fixed-size row blocks on a thread
+# pool (the BLAS products release the GIL), and only each block's hits
+# (at most SEARCH_TOP_K of them, when set) are kept before merging. Extra
+# memory per query is then O(threads * block + hits) instead of
+# O(segment), and the mmap is streamed through the page cache one block
+# at a time.
+SEARCH_BLOCK_ROWS = int(os.getenv("SEARCH_BLOCK_ROWS", "8192"))
+# Containers often report the host's CPU count, so the default is capped
+MAX_DEFAULT_SEARCH_THREADS = 4
+SEARCH_THREADS = int(os.getenv("SEARCH_THREADS", str(min(os.cpu_count() or 1, MAX_DEFAULT_SEARCH_THREADS))))
+# 0 (default) keeps every hit >= the threshold floor, as search always has;
+# set it to cap how many hits a search can return (and its memory)
+SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", "0"))
+
+# Batch scoring budget for one block's float32 (rows x queries) score
+# matrix; rows per block are derived from the query count (_batch_block_rows).
+# Up to SEARCH_THREADS blocks are scored at once.
+BATCH_BLOCK_BYTES = int(os.getenv("BATCH_BLOCK_BYTES", str(16 * 1024 ** 2)))
+
 # ================= LAZY-LOADED SINGLETONS =================
 
 _vectors = None
-_metadata_idx = None # List of (acc_no, is_title_bool)
+# Per-chunk metadata as flat NumPy arrays rather than a list of tuples:
+# no per-row Python objects means no refcount writes, so the pages stay
+# shared copy-on-write between pre-forked workers (see gunicorn_conf.py).
+_acc_nos = None   # int32[n_chunks]
+# field -> rows of that field. A slice when the artifact is laid out as
+# contiguous per-field blocks (see build_embeddings), else an index array
+# for older interleaved artifacts.
+_segments = None
+# Per-chunk filter columns from attributes.npz (None if not built)
+_attributes = None
+_publishers = None  # publisher vocabulary, indexed by attributes["publisher_id"]
 _model = None
 _lock = threading.Lock()
 _loading = False
+# Created on first search, never in the gunicorn master: threads do not
+# survive fork(), so each worker builds its own pool.
+_pool = None
+# artifacts_key() of the files this process loaded (ETags are built from it)
+_artifacts_key = None
+
 
+def _ensure_loaded(model=None):
+    """
+    Load model, vectors, and metadata on first use (not at import time).
 
-def _ensure_loaded():
-    """Load model, vectors, and metadata on first use (not at import time)."""
-    global _vectors, _metadata_idx, _model, _loading
+    `model` lets benchmarks and offline tools supply any object with a
+    SentenceTransformer-compatible `encode()` instead of loading MODEL_NAME.
+    """
+    global _vectors, _acc_nos, _segments, _attributes, _publishers, _model, _loading, _artifacts_key
 
     if _model is not None:
         return  # already loaded
@@ -42,15 +94,20 @@ def _ensure_loaded():
             return  # double-check after acquiring lock
 
         _loading = True
+        load_start = time.perf_counter()
 
         # Auto-build if embeddings are missing
         if not VECTORS_PATH.exists() or not METADATA_PATH.exists():
             print("⚙️  Embeddings not found — building automatically...")
             sys.path.insert(0, str(BASE_DIR))
             from scripts.build_embeddings import build_embeddings
-            build_embeddings()
+            build_embeddings(out_dir=EMBEDDINGS_DIR)
             print("✅ Embeddings built successfully.")
 
+        # Recorded before reading: if the files change mid-load, the data is
+        # at least as new as the version, so caches are never left behind
+        _artifacts_key = artifacts_key()
+
         print("▶ Loading embedding vectors (mmap)...")
         # Use mmap_mode='r' to keep vectors on disk, saving ~130MB RAM
         _vectors = np.load(VECTORS_PATH, mmap_mode='r')
@@ -61,34 +118,259 @@ def _ensure_loaded():
         # This saves ~50MB RAM by discarding the 'text' chunks.
         with open(METADATA_PATH, "r", encoding="utf-8") as f:
             raw_data = json.load(f)
-            _metadata_idx = [
-                (item["acc_no"], item["field"] == "title")
-                for item in raw_data
-            ]
+            n = len(raw_data)
+            _acc_nos = np.fromiter((item["acc_no"] for item in raw_data), dtype=np.int32, count=n)
+            _segments = _load_segments(raw_data)
             del raw_data # Free memory immediately
 
+        if ATTRIBUTES_PATH.exists():
+            print("▶ Loading filter attributes...")
+            with np.load(ATTRIBUTES_PATH, allow_pickle=False) as data:
+                _attributes = {k: data[k] for k in ("year", "class_code", "publisher_id")}
+                _publishers = [str(p) for p in data["publishers"]]
+
         if _vectors.shape[1] != VECTOR_DIM:
             raise RuntimeError("Embedding dimension mismatch")
 
-        print("▶ Loading sentence-transformer model...")
-        from sentence_transformers import SentenceTransformer
-        _model = SentenceTransformer(MODEL_NAME)
+        if model is None:
+            print("▶ Loading sentence-transformer model...")
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(MODEL_NAME)
+        _model = model
 
         _loading = False
-        print(f"✅ Semantic engine ready ({len(_metadata_idx)} vectors loaded)")
+        set_gauge("engine_load_seconds", time.perf_counter() - load_start)
+        set_gauge("engine_vectors", len(_acc_nos))
+        print(f"✅ Semantic engine ready ({len(_acc_nos)} vectors loaded)")
+
+
+def _load_segments(raw_data):
+    """Per-field row ranges: the manifest's range table, else derived from metadata."""
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            ranges = json.load(f).get("segments")
+        if ranges and max(stop for _, stop in ranges.values()) == len(raw_data):
+            return {field: slice(start, stop) for field, (start, stop) in ranges.items()}
+
+    names = []
+    codes = np.empty(len(raw_data), dtype=np.uint8)
+    for i, item in enumerate(raw_data):
+        if item["field"] not in names:
+            names.append(item["field"])
+        codes[i] = names.index(item["field"])
+
+    segments = {}
+    for code, field in enumerate(names):
+        rows = np.flatnonzero(codes == code)
+        if rows[-1] - rows[0] + 1 == len(rows):
+            segments[field] = slice(int(rows[0]), int(rows[-1]) + 1)
+        else:
+            segments[field] = rows
+    return segments
+
+
+def artifacts_key() -> str:
+    """Version of the embedding artifacts on disk: the manifest, else the raw files."""
+    if MANIFEST_PATH.exists():
+        return stat_key(MANIFEST_PATH)
+    return f"{stat_key(VECTORS_PATH)}|{stat_key(METADATA_PATH)}"
+
+
+def loaded_artifacts_key() -> str:
+    """
+    Version of the artifacts this process is serving. Files rebuilt after
+    loading are not picked up until restart, so this stays at the loaded
+    version; before the first load it is the on-disk one (the next search
+    loads those files).
+    """
+    return _artifacts_key if _model is not None else artifacts_key()
 
 
 # ================= ENGINE =================
 
-def semantic_search(query: str, allowed_fields=None):
+def _threshold_schedule():
+    thresholds = []
+    threshold = DEFAULT_THRESHOLD
+    while threshold >= MIN_THRESHOLD:
+        thresholds.append(threshold)
+        threshold -= THRESHOLD_STEP
+    return thresholds, threshold
+
+
+def _filter_mask(filters):
+    """
+    Boolean mask over all chunks for the structured filters, or None when
+    no filter is set. Keys: year_min, year_max, class_prefix, publisher.
+    Chunks with an unknown value never match a filter on that attribute.
+    """
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    if not filters:
+        return None
+    if _attributes is None:
+        raise ValueError("Filters are unavailable: rebuild embeddings to create attributes.npz")
+
+    mask = np.ones(len(_acc_nos), dtype=bool)
+    year = _attributes["year"]
+    if "year_min" in filters or "year_max" in filters:
+        mask &= year != UNKNOWN_YEAR
+    if "year_min" in filters:
+        mask &= year >= filters["year_min"]
+    if "year_max" in filters:
+        mask &= year <= filters["year_max"]
+    if "class_prefix" in filters:
+        low, high = dewey_prefix_range(filters["class_prefix"])
+        code = _attributes["class_code"]
+        mask &= (code >= low) & (code < high)
+    if "publisher" in filters:
+        needle = filters["publisher"].strip().lower()
+        ids = [i for i, name in enumerate(_publishers) if needle in name]
+        mask &= np.isin(_attributes["publisher_id"], ids)
+    return mask
+
+
+def validate_filters(filters):
+    """Raise ValueError for filters the engine cannot apply (loads the engine)."""
+    _ensure_loaded()
+    _filter_mask(filters)
+
+
+def _iter_segments(allowed_fields, mask):
+    """
+    Yield (field, rows, selected) for each segment to score.
+
+    `rows` is a slice or index array into _vectors; `selected` holds the
+    positions within `rows` that pass `mask`, or None when every row does.
+    Selective filters are turned into a gathered index array instead, so
+    only the surviving rows are ever scored.
+    """
+    for field, rows in _segments.items():
+        if allowed_fields and field not in allowed_fields:
+            continue
+        selected = None
+        if mask is not None:
+            selected = np.flatnonzero(mask[rows])
+            if not len(selected):
+                continue
+            seg_len = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+            if len(selected) < seg_len * FILTER_GATHER_FRACTION:
+                # Selective filter: gather just the surviving rows
+                rows = (selected + rows.start) if isinstance(rows, slice) else rows[selected]
+                selected = None
+        yield field, rows, selected
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="score")
+    return _pool
+
+
+def _map_blocks(fn, blocks):
+    """fn(rows, local) over blocks, in order; on the scoring pool when enabled."""
+    if SEARCH_THREADS <= 1:
+        return (fn(*block) for block in blocks)
+    return _executor().map(lambda block: fn(*block), blocks)
+
+
+def _blocks(rows, selected, block_rows):
+    """
+    Split one segment from _iter_segments into blocks of `block_rows` rows.
+    Yields (rows, local): a slice or index array into _vectors, and the
+    positions within it passing the mask (None when every row does).
+    """
+    seg_len = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+    for b0 in range(0, seg_len, block_rows):
+        b1 = min(b0 + block_rows, seg_len)
+        local = None
+        if selected is not None:
+            lo, hi = np.searchsorted(selected, (b0, b1))
+            if lo == hi:
+                continue
+            local = selected[lo:hi] - b0
+        if isinstance(rows, slice):
+            yield slice(rows.start + b0, rows.start + b1), local
+        else:
+            yield rows[b0:b1], local
+
+
+def _top_k(rows, scores):
+    """Keep the SEARCH_TOP_K best (rows, scores) pairs, unordered; all if 0."""
+    k = SEARCH_TOP_K
+    if k and len(scores) > k:
+        keep = np.argpartition(scores, -k)[-k:]
+        return rows[keep], scores[keep]
+    return rows, scores
+
+
+def _merge_top_k(current, rows, scores):
+    """Fold one block's hits into a running top-k (None before the first block)."""
+    if current is None:
+        return _top_k(rows, scores)
+    return _top_k(np.concatenate((current[0], rows)), np.concatenate((current[1], scores)))
+
+
+def _absolute(block, positions):
+    return positions + block.start if isinstance(block, slice) else block[positions]
+
+
+def _collect(per_field):
+    """
+    Concatenate per-field running top-k results into (row indices, scores,
+    field names), cut to the overall top SEARCH_TOP_K.
+    """
+    per_field = [(field, hits) for field, hits in per_field if hits is not None]
+    if not per_field:
+        return np.empty(0, dtype=np.int64), np.empty(0), []
+    rows = np.concatenate([hits[0] for _, hits in per_field])
+    scores = np.concatenate([hits[1] for _, hits in per_field])
+    fields = [field for field, hits in per_field for _ in range(len(hits[0]))]
+    if SEARCH_TOP_K and len(scores) > SEARCH_TOP_K:
+        keep = np.argpartition(scores, -SEARCH_TOP_K)[-SEARCH_TOP_K:]
+        return rows[keep], scores[keep], [fields[i] for i in keep]
+    return rows, scores, fields
+
+
+def _score_segments(query_vec, allowed_fields, floor, mask=None):
+    """
+    Score only the segments named in `allowed_fields` (all if None),
+    restricted to rows passing `mask`, and keep the top SEARCH_TOP_K chunks
+    scoring >= `floor`. Returns (row indices, scores, field names).
+    """
+    def score_block(block, local):
+        # A slice of the memmap is a view; index arrays gather a copy
+        scores = cosine_similarity(query_vec, _vectors[block])
+        if local is not None:
+            keep = local[scores[local] >= floor]
+        else:
+            keep = np.flatnonzero(scores >= floor)
+        return _top_k(_absolute(block, keep), scores[keep])
+
+    per_field = []
+    for field, rows, selected in _iter_segments(allowed_fields, mask):
+        hits = None
+        for block_rows, block_scores in _map_blocks(score_block, _blocks(rows, selected, SEARCH_BLOCK_ROWS)):
+            hits = _merge_top_k(hits, block_rows, block_scores)
+        per_field.append((field, hits))
+    return _collect(per_field)
+
+
+def semantic_search(query: str, allowed_fields=None, filters=None):
     """
     allowed_fields:
         None            → title + description
-        ["title"]       → title only
+        ["title"]       → title only (description segment is never scored)
+    filters:
+        None or dict of year_min / year_max / class_prefix / publisher,
+        applied as a mask before scoring (see _filter_mask)
     """
     _ensure_loaded()
+    inc("semantic_searches_total")
 
-    query = normalize_query(query)
+    with stage("normalize"):
+        query = normalize_query(query)
     if not query:
         return {
             "results": [],
@@ -96,34 +378,33 @@ def semantic_search(query: str, allowed_fields=None):
             "threshold_reduced": False
         }
 
-    query_vec = _model.encode(query)
+    # Before encoding, so an invalid filter fails without model work
+    with stage("filter"):
+        mask = _filter_mask(filters)
 
-    similarities = cosine_similarity(query_vec, _vectors)
+    with stage("encode"):
+        query_vec = _model.encode(query)
 
-    threshold = DEFAULT_THRESHOLD
-    threshold_reduced = False
+    thresholds, exhausted = _threshold_schedule()
 
-    while threshold >= MIN_THRESHOLD:
-        matches = []
+    with stage("score"):
+        rows, scores, fields = _score_segments(query_vec, allowed_fields, min(thresholds), mask)
 
-        for idx, score in enumerate(similarities):
-            if score < threshold:
-                continue
+    with stage("threshold"):
+        return _apply_thresholds(rows, scores, fields, thresholds, exhausted)
 
-            acc_no, is_title = _metadata_idx[idx]
-            field = "title" if is_title else "description"
 
-            if allowed_fields and field not in allowed_fields:
-                continue
+def _apply_thresholds(rows, scores, fields, thresholds, exhausted):
+    for threshold in thresholds:
+        hits = np.flatnonzero(scores >= threshold)
 
-            matches.append({
-                "acc_no": acc_no,
-                "field": field,
+        if len(hits):
+            matches = [{
+                "acc_no": int(_acc_nos[rows[i]]),
+                "field": fields[i],
                 "text": "...", # Text is discarded to save RAM
-                "similarity": float(score)
-            })
-
-        if matches:
+                "similarity": float(scores[i])
+            } for i in hits]
             matches.sort(
                 key=lambda x: (-x["similarity"], x["acc_no"])
             )
@@ -133,11 +414,84 @@ def semantic_search(query: str, allowed_fields=None):
                 "threshold_reduced": threshold < DEFAULT_THRESHOLD
             }
 
-        threshold -= THRESHOLD_STEP
-        threshold_reduced = True
+        inc("threshold_reductions_total")
 
     return {
         "results": [],
-        "final_threshold": threshold,
+        "final_threshold": exhausted,
         "threshold_reduced": True
     }
+
+
+def _batch_block_rows(num_queries: int) -> int:
+    return max(BATCH_BLOCK_BYTES // (4 * max(num_queries, 1)), 1024)
+
+
+def semantic_search_batch(queries, allowed_fields=None, filters=None):
+    """
+    Run many queries in one pass: a single model.encode() over all of them
+    and one matrix-matrix product per block of rows, instead of one encode
+    and one full scan per query.
+
+    Yields (index, result) in input order; each result has the same shape
+    as semantic_search()'s.
+    """
+    _ensure_loaded()
+
+    with stage("normalize"):
+        normalized = [normalize_query(q) for q in queries]
+    live = [i for i, q in enumerate(normalized) if q]
+    inc("semantic_searches_total", len(live))
+    inc("batch_searches_total")
+
+    with stage("filter"):
+        mask = _filter_mask(filters)
+
+    thresholds, exhausted = _threshold_schedule()
+    floor = min(thresholds)
+    hits = {i: [] for i in live}  # query index -> [(field, running top-k)]
+
+    if live:
+        with stage("encode"):
+            query_matrix = np.asarray(
+                _model.encode([normalized[i] for i in live], batch_size=64),
+                dtype=np.float32,
+            )
+
+        def score_block(block, local):
+            """Per query column with hits: this block's top-k (rows, scores)."""
+            scores = cosine_similarity_batch(query_matrix, _vectors[block])
+            if local is not None:
+                r, c = np.nonzero(scores[local] >= floor)
+                r = local[r]
+            else:
+                r, c = np.nonzero(scores >= floor)
+            absolute, values = _absolute(block, r), scores[r, c]
+            out = {}
+            for q in np.unique(c):
+                sel = c == q
+                out[int(q)] = _top_k(absolute[sel], values[sel])
+            return out
+
+        with stage("score"):
+            for field, rows, selected in _iter_segments(allowed_fields, mask):
+                running = {}
+                block_rows = _batch_block_rows(len(live))
+                for block_hits in _map_blocks(score_block, _blocks(rows, selected, block_rows)):
+                    for q, (block_rows, block_scores) in block_hits.items():
+                        running[q] = _merge_top_k(running.get(q), block_rows, block_scores)
+                for q, top in running.items():
+                    hits[live[q]].append((field, top))
+
+    for i in range(len(queries)):
+        if i not in hits:
+            yield i, {
+                "results": [],
+                "final_threshold": DEFAULT_THRESHOLD,
+                "threshold_reduced": False
+            }
+            continue
+        rows, scores, fields = _collect(hits.pop(i))
+        with stage("threshold"):
+            result = _apply_thresholds(rows, scores, fields, thresholds, exhausted)
+        yield i, result
@@ -0,0 +1,194 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+from .utils import normalize_query, stat_key
+from .metrics import set_gauge
+
+# ================= CONFIG =================
+
+MAX_SUGGESTIONS = 10
+# Top lists for every prefix up to this length are precomputed at build
+# time; short prefixes match thousands of keys and would be slow to rank.
+PRECOMPUTE_PREFIX_LEN = 3
+# A word-start match ("learning" in "machine learning") ranks below any
+# match at the start of the title/author
+START_BONUS = 1 << 30
+
+# ================= INDEX =================
+# Sorted array of normalized keys + bisect: the range of keys starting with
+# a prefix is found in O(log n), with no per-keystroke model or DB work.
+# A max segment tree over the keys' ranks then yields that range best-first
+# in O(k log n), however many keys the prefix matches.
+
+_keys = None         # sorted normalized strings
+_key_entries = None  # int32, parallel to _keys: entry id
+_key_ranks = None    # int64, parallel to _keys: popularity (+ START_BONUS)
+_tree = None         # int64[2 * size]: position of the best key under each node, -1 if empty
+_entries = None      # entry id -> (text, kind, query, count)
+_top = None          # short prefix -> [entry ids], best first
+_db_key = None       # stat_key() of the DB the index was built from
+_lock = threading.Lock()
+
+
+def _build_max_tree(ranks):
+    size = 1
+    while size < len(ranks):
+        size *= 2
+    tree = np.full(2 * size, -1, dtype=np.int64)
+    tree[size:size + len(ranks)] = np.arange(len(ranks))
+    # Rank by position; position -1 (empty) indexes the trailing -1
+    padded = np.append(ranks, -1)
+    level = size // 2
+    while level:
+        nodes = np.arange(level, 2 * level)
+        left, right = tree[2 * nodes], tree[2 * nodes + 1]
+        tree[nodes] = np.where(padded[right] > padded[left], right, left)
+        level //= 2
+    return tree
+
+
+def _ranked(lo, hi):
+    """Key positions in [lo, hi), highest rank first (ties in key order)."""
+    size = len(_tree) // 2
+    heap = []
+
+    def push(node):
+        pos = int(_tree[node])
+        if pos >= 0:
+            heapq.heappush(heap, (-int(_key_ranks[pos]), pos, node))
+
+    # Cover [lo, hi) with O(log n) whole subtrees
+    left, right = lo + size, hi + size
+    while left < right:
+        if left & 1:
+            push(left)
+            left += 1
+        if right & 1:
+            right -= 1
+            push(right)
+        left //= 2
+        right //= 2
+
+    while heap:
+        _, pos, node = heapq.heappop(heap)
+        if node >= size:
+            yield pos
+        else:
+            push(2 * node)
+            push(2 * node + 1)
+
+
+def build_index(db_path):
+    """Build the prefix index from the books table (titles and authors)."""
+    global _keys, _key_entries, _key_ranks, _tree, _entries, _top, _db_key
+
+    start = time.perf_counter()
+    # Taken before reading, like the engine's artifacts key
+    db_key = stat_key(db_path)
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT Title, Author_Editor FROM books").fetchall()
+    conn.close()
+
+    # Popularity = number of catalogue rows (copies / books by the author)
+    counts = Counter()
+    display = {}
+    for title, author in rows:
+        for kind, value in (("title", title), ("author", author)):
+            norm = normalize_query(str(value)) if value else ""
+            if norm:
+                counts[(kind, norm)] += 1
+                display.setdefault((kind, norm), str(value).strip())
+
+    entries = []
+    keyed = []
+    for (kind, norm), count in counts.items():
+        entry_id = len(entries)
+        entries.append((display[(kind, norm)], kind, norm, count))
+        # Index the whole string and every later word start
+        words = norm.split(" ")
+        offset = 0
+        for i, word in enumerate(words):
+            rank = count + (START_BONUS if i == 0 else 0)
+            keyed.append((norm[offset:], entry_id, rank))
+            offset += len(word) + 1
+
+    keyed.sort(key=lambda k: k[0])
+
+    top = {}
+    for key, entry_id, rank in keyed:
+        for n in range(1, min(len(key), PRECOMPUTE_PREFIX_LEN) + 1):
+            top.setdefault(key[:n], {})
+            best = top[key[:n]]
+            if best.get(entry_id, -1) < rank:
+                best[entry_id] = rank
+    top = {
+        prefix: [e for e, _ in heapq.nlargest(MAX_SUGGESTIONS, ranks.items(), key=lambda x: x[1])]
+        for prefix, ranks in top.items()
+    }
+
+    # Assigned last, _keys after the rest, so readers never see a half-built index
+    _key_entries = np.array([k[1] for k in keyed], dtype=np.int32)
+    _key_ranks = np.array([k[2] for k in keyed], dtype=np.int64)
+    _tree = _build_max_tree(_key_ranks)
+    _entries = entries
+    _top = top
+    _db_key = db_key
+    _keys = [k[0] for k in keyed]
+
+    set_gauge("suggest_index_keys", len(keyed))
+    set_gauge("suggest_index_build_seconds", time.perf_counter() - start)
+
+
+def ensure_built(db_path) -> bool:
+    """Build once (at startup, or pre-fork under gunicorn). False if no DB yet."""
+    if _keys is not None:
+        return True
+    if not os.path.exists(db_path):
+        return False  # sqlite3.connect would create an empty file
+    with _lock:
+        if _keys is None:
+            try:
+                build_index(db_path)
+            except sqlite3.Error:
+                return False
+    return True
+
+
+def loaded_db_key(db_path) -> str:
+    """Version of the DB the index was built from (the on-disk one if not built yet)."""
+    return _db_key if _keys is not None else stat_key(db_path)
+
+
+def suggest(prefix: str, limit: int = MAX_SUGGESTIONS):
+    """Popularity-ranked completions for `prefix` (titles and authors)."""
+    prefix = normalize_query(prefix)
+    if not prefix or _keys is None:
+        return []
+
+    if len(prefix) <= PRECOMPUTE_PREFIX_LEN:
+        ids = _top.get(prefix, [])[:limit]
+    else:
+        lo = bisect_left(_keys, prefix)
+        hi = bisect_left(_keys, prefix + "\uffff", lo)
+        # An entry can match through several keys (full string, word
+        # starts); its best-ranked key decides its place
+        ids = []
+        for pos in _ranked(lo, hi):
+            entry_id = int(_key_entries[pos])
+            if entry_id not in ids:
+                ids.append(entry_id)
+                if len(ids) == limit:
+                    break
+
+    out = []
+    for entry_id in ids:
+        text, kind, query, count = _entries[entry_id]
+        out.append({"text": text, "kind": kind, "query": query, "count": count})
+    return out
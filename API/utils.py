@@ -1,16 +1,107 @@
 import numpy as np
 import re
+from pathlib import Path
 
 def normalize_query(text: str) -> str:
     if not text:
         return ""
     return re.sub(r"\s+", " ", text.strip().lower())
 
+def _row_norms(matrix: np.ndarray) -> np.ndarray:
+    # einsum sums squares row by row; np.linalg.norm(axis=1) would first
+    # materialize a squared copy of the whole (mmap'd) block
+    return np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+
 def cosine_similarity(query_vec: np.ndarray, matrix: np.ndarray) -> np.ndarray:
     query_norm = np.linalg.norm(query_vec)
-    matrix_norms = np.linalg.norm(matrix, axis=1)
+    matrix_norms = _row_norms(matrix)
 
     if query_norm == 0:
         return np.zeros(len(matrix))
 
     return np.dot(matrix, query_vec) / (matrix_norms * query_norm + 1e-10)
+
+def cosine_similarity_batch(query_matrix: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    (n_rows, n_queries) similarities from one matrix-matrix product,
+    normalized in place: the product is the only (rows x queries) array.
+    """
+    query_norms = _row_norms(query_matrix)
+    matrix_norms = _row_norms(matrix)
+    scores = np.dot(matrix, query_matrix.T)
+    scores /= (matrix_norms + 1e-10)[:, None]
+    # A zero query scores 0 everywhere (its dot products are already 0)
+    scores /= np.where(query_norms == 0, np.inf, query_norms)
+    return scores
+
+# ---------------- STRUCTURED ATTRIBUTES ----------------
+# dewey_code() runs on catalogue values (scripts/build_embeddings.py) and
+# dewey_prefix_range() on query filters (the engine), mapping both onto the
+# same class * 1000 + decimals scale. A catalogue value with a short class
+# ('5.133') is read as written without its leading zeros (005.133); a
+# query prefix is a prefix ('5' is 500-599), so it only takes decimals
+# after a full three-digit class.
+
+UNKNOWN_YEAR = 0
+UNKNOWN_CODE = -1
+
+_YEAR_RE = re.compile(r"(1[5-9]\d\d|20\d\d)")
+_DEWEY_RE = re.compile(r"(\d{1,3})(?:\.(\d+))?")
+
+def parse_year(value) -> int:
+    if value is None:
+        return UNKNOWN_YEAR
+    match = _YEAR_RE.search(str(value))
+    return int(match.group(1)) if match else UNKNOWN_YEAR
+
+def dewey_code(class_no) -> int:
+    """'005.133 PYT' -> 5133: Dewey class * 1000 + first three decimals."""
+    if not class_no:
+        return UNKNOWN_CODE
+    match = _DEWEY_RE.search(str(class_no))
+    if not match:
+        return UNKNOWN_CODE
+    decimals = (match.group(2) or "")[:3].ljust(3, "0")
+    return int(match.group(1)) * 1000 + int(decimals)
+
+def dewey_prefix_range(prefix: str):
+    """
+    Half-open [low, high) range of dewey_code() values matching a class
+    prefix: '005' -> [5000, 6000), '005.1' -> [5100, 5200), '00' -> [0, 10000).
+    Decimals after a short class ('5.1') are rejected, not dropped.
+    """
+    match = re.fullmatch(r"\s*(\d{1,3})(?:\.(\d{0,3})\d*)?\s*", prefix or "")
+    if not match:
+        raise ValueError(f"Invalid class prefix: {prefix!r}")
+    major, decimals = match.group(1), match.group(2)
+    if len(major) < 3:
+        if decimals is not None:
+            raise ValueError(f"Invalid class prefix: {prefix!r} (decimals need a three-digit class)")
+        # '00' means classes 000-009
+        low = int(major.ljust(3, "0")) * 1000
+        return low, low + 10 ** (3 - len(major)) * 1000
+    decimals = decimals or ""
+    low = int(major) * 1000 + int(decimals.ljust(3, "0"))
+    return low, low + 10 ** (3 - len(decimals))
+
+def normalize_publisher(place_publisher) -> str:
+    """'New Delhi: PHI Learning' -> 'phi learning' (place dropped)."""
+    if not place_publisher:
+        return ""
+    text = str(place_publisher)
+    if ":" in text:
+        text = text.split(":", 1)[1]
+    return re.sub(r"\s+", " ", text.strip(" ,.;").lower())
+
+# ---------------- FILE VERSIONS ----------------
+# Shared by the engine and the suggest index (recorded when they load) and
+# http_cache (ETags), so a loaded version and an on-disk one compare equal.
+
+def stat_key(path) -> str:
+    """'name:size:mtime_ns' of `path`, or 'name:missing'."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return f"{path.name}:missing"
+    return f"{path.name}:{st.st_size}:{st.st_mtime_ns}"
@@ -6,17 +6,21 @@ import time
 import re
 import sys
 import os
+from pathlib import Path
 from urllib.parse import quote_plus
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from cli_helper import setup_cli, check_help
+from data_format import read_books, write_books
 
 # Check for --help early
 check_help("Scrape book descriptions using staged multi-source enrichment.")
 
 # ---------------- CONFIG ----------------
-DEFAULT_INPUT_CSV_PATH = "D:\DAU\SEM 2\BDE\Assignment\Assignment 1\Assignment 1\Big-Data-Engg\Data\dau_library_data.csv"
-DEFAULT_OUTPUT_CSV_PATH = "D:\DAU\SEM 2\BDE\Assignment\Assignment 1\Assignment 1\Big-Data-Engg\Data\FinalDATA.csv"
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INPUT_PATH = BASE_DIR / "Data" / "dau_library_data.csv"
+# Typed Parquet for the next stage (Database/SQLite3.py); a .csv path exports instead
+DEFAULT_OUTPUT_PATH = BASE_DIR / "Data" / "FinalDATA.parquet"
 
 USER_AGENT = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
@@ -121,8 +125,9 @@ def fetch_google_api_fallback(title, author):
 
 # ---------------- PIPELINE ----------------
 def run_scrape(input, output, sleep_time):
-    print("🔹 Loading input CSV...")
-    df = pd.read_csv(input, encoding="latin1")
+    print("🔹 Loading input...")
+    # CSV import or a previous Parquet output, typed either way (ISBN stays a string)
+    df = read_books(input)
 
     df = df.drop_duplicates(subset=[
         "Title",
@@ -135,8 +140,7 @@ def run_scrape(input, output, sleep_time):
         "Class_No"
     ])
 
-    if "description" not in df.columns:
-        df["description"] = "Not Found"
+    df["description"] = df["description"].fillna("Not Found")
 
     # ---------- STAGE 1: OpenLibrary ----------
     print("📚 Stage 1: OpenLibrary enrichment")
@@ -179,7 +183,7 @@ def run_scrape(input, output, sleep_time):
 
         time.sleep(sleep_time)
 
-    df.to_csv(output, index=False, encoding="latin1")
+    write_books(df, output)
     print("✅ Enrichment completed")
     print("📁 Output saved to:", output)
 
@@ -190,19 +194,19 @@ if __name__ == "__main__":
         "Scrape book descriptions using staged multi-source enrichment.",
         [
             {
-                'name': '--input_csv',
+                'name': '--input',
                 'kwargs': {
                     'type': str,
-                    'default': DEFAULT_INPUT_CSV_PATH,
-                    'help': 'Path to input CSV file'
+                    'default': str(DEFAULT_INPUT_PATH),
+                    'help': 'Path to input file (.csv import or .parquet)'
                 }
             },
             {
-                'name': '--output_csv',
+                'name': '--output',
                 'kwargs': {
                     'type': str,
-                    'default': DEFAULT_OUTPUT_CSV_PATH,
-                    'help': 'Path to output CSV file'
+                    'default': str(DEFAULT_OUTPUT_PATH),
+                    'help': 'Path to output file (.parquet, or .csv to export)'
                 }
             },
             {
@@ -216,4 +220,4 @@ if __name__ == "__main__":
         ]
     )
 
-    run_scrape(args.input_csv, args.output_csv, args.sleep_time)
+    run_scrape(args.input, args.output, args.sleep_time)
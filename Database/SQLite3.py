@@ -1,38 +1,31 @@
 import sqlite3
-import pandas as pd
 import sys
 import os
+import time
 from pathlib import Path
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from cli_helper import setup_cli, check_help
+from data_format import BOOK_COLUMNS, DEFAULT_BATCH_SIZE, iter_book_rows
 
 # Check for --help early
-check_help("Script to import CSV data into SQLite database.")
+check_help("Script to load the enriched catalogue (Parquet or CSV) into SQLite.")
+
+# ================= CONFIG =================
 
 # Resolve paths relative to project root
 BASE_DIR = Path(__file__).resolve().parent.parent
-CSV_PATH = BASE_DIR / "Data" / "FinalDATA.csv"
+INPUT_PATH = BASE_DIR / "Data" / "FinalDATA.parquet"
 DB_PATH = BASE_DIR / "Database" / "db.sqlite3"
 
-# Read CSV
-df = pd.read_csv(CSV_PATH)
-
-# SQLite connection
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-print(f"Database path: {DB_PATH}")
-
-# Drop existing table to recreate with new columns
-cursor.execute("DROP TABLE IF EXISTS books")
-
-# Create table with ALL columns including image_url and book_url
-cursor.execute("""
+# Table with ALL columns including image_url and book_url. ISBN is TEXT: with
+# INTEGER affinity SQLite would turn '0131103628' into 131103628.
+CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS books (
     Acc_Date TEXT,
     Acc_No INTEGER PRIMARY KEY,
     Title TEXT,
-    ISBN INTEGER,
+    ISBN TEXT,
     Author_Editor TEXT,
     Edition_Volume TEXT,
     Place_Publisher TEXT,
@@ -43,35 +36,53 @@ CREATE TABLE IF NOT EXISTS books (
     image_url TEXT,
     book_url TEXT
 )
-""")
+"""
+
+INSERT_SQL = f"""
+INSERT OR IGNORE INTO books ({", ".join(BOOK_COLUMNS)})
+VALUES ({", ".join("?" for _ in BOOK_COLUMNS)})
+"""
+
+# ================= LOAD =================
+
+def load_books(input_path=INPUT_PATH, db_path=DB_PATH, batch_size=DEFAULT_BATCH_SIZE) -> int:
+    """
+    Recreate the books table from `input_path` (.parquet, or .csv as an
+    import format). Rows are streamed `batch_size` at a time with only the
+    table's columns read, so memory stays flat as the catalogue grows.
+    Returns the number of rows read.
+    """
+    conn = sqlite3.connect(db_path)
+    print(f"Database path: {db_path}")
+
+    # Drop existing table to recreate with new columns
+    conn.execute("DROP TABLE IF EXISTS books")
+    conn.execute(CREATE_TABLE_SQL)
+
+    total = 0
+    for rows in iter_book_rows(input_path, BOOK_COLUMNS, batch_size):
+        conn.executemany(INSERT_SQL, rows)
+        total += len(rows)
 
-for _, row in df.iterrows():
-    cursor.execute("""
-    INSERT OR IGNORE INTO books
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        row["Acc_Date"],
-        int(row["Acc_No"]),
-        row["Title"],
-        str(row["ISBN"]),
-        row["Author_Editor"],
-        row["Edition_Volume"],
-        row["Place_Publisher"],
-        row["Year"],
-        row["Pages"],
-        row["Class_No"],
-        row["description"],
-        row.get("image_url", None),
-        row.get("book_url", None),
-    ))
+    # Expression index matching the API's normalized-ISBN lookups
+    # (/search/isbn, /search/batch), so they are index probes, not table scans
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_isbn_norm ON books(REPLACE(ISBN, '-', ''))")
 
-conn.commit()
-conn.close()
+    conn.commit()
+    conn.close()
+    return total
 
-print("FULL CSV copied into SQLite (all columns including image_url and book_url)")
 
 if __name__ == "__main__":
     args = setup_cli(
-        "Script to import CSV data into SQLite database.",
-        []
+        "Script to load the enriched catalogue (Parquet or CSV) into SQLite.",
+        [
+            {'name': '--input', 'kwargs': {'type': str, 'default': str(INPUT_PATH), 'help': 'Enriched catalogue (.parquet, or .csv to import)'}},
+            {'name': '--db', 'kwargs': {'type': str, 'default': str(DB_PATH), 'help': 'SQLite database to (re)create'}},
+            {'name': '--batch_size', 'kwargs': {'type': int, 'default': DEFAULT_BATCH_SIZE, 'help': 'Rows per insert batch'}},
+        ]
     )
+    start = time.perf_counter()
+    count = load_books(args.input, args.db, args.batch_size)
+    print(f"{count} books copied into SQLite in {time.perf_counter() - start:.1f}s "
+          "(all columns including image_url and book_url)")
@@ -0,0 +1,46 @@
+import hashlib
+import re
+
+import numpy as np
+
+VECTOR_DIM = 384
+
+
+class HashingEncoder:
+    """
+    Deterministic, network-free stand-in for SentenceTransformer.
+
+    Each token maps to a fixed pseudo-random direction (seeded from a hash
+    of the token); a text is the normalized sum of its token directions.
+    Texts sharing words therefore score higher than unrelated ones, which is
+    enough to exercise thresholds and ranking without downloading weights.
+    Only the `encode()` surface used by the engine and build script is
+    implemented.
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self._token_cache = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vec = self._token_cache.get(token)
+        if vec is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._token_cache[token] = vec
+        return vec
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        out = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            out += self._token_vector(token)
+        norm = np.linalg.norm(out)
+        return out / norm if norm else out
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False,
+               normalize_embeddings=True, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        if not len(texts):
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._encode_one(t) for t in texts])
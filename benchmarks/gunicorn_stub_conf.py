@@ -0,0 +1,18 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Same settings and hooks as production, but the master preloads the
+# engine with the hashing encoder so worker benchmarks need no model.
+import gunicorn_conf
+from gunicorn_conf import *  # noqa: F401,F403
+
+
+def _load_stub_engine():
+    from API import semantic_engine
+    from benchmarks.encoders import HashingEncoder
+    semantic_engine._ensure_loaded(model=HashingEncoder())
+
+
+gunicorn_conf._load_engine = _load_stub_engine
@@ -0,0 +1,250 @@
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+
+# ================== CONFIG ==================
+
+ENDPOINTS = ("book_by_id", "isbn", "title", "semantic", "unified")
+DEFAULT_REQUESTS = 200          # per endpoint
+DEFAULT_CONCURRENCY = 8
+DEFAULT_SEED = 7
+SERVER_START_TIMEOUT = 600      # seconds; 1M-chunk metadata takes a while to load
+
+# ================== WORKLOAD ==================
+
+def build_workload(db_path, endpoints=ENDPOINTS, per_endpoint=DEFAULT_REQUESTS, seed=DEFAULT_SEED):
+    """
+    Return a shuffled list of (endpoint, path) pairs drawn from real rows of
+    the target catalogue, so ID/ISBN lookups hit and title queries use
+    vocabulary that exists in the index. The same catalogue and `seed`
+    always give the same workload.
+    """
+    # Picked with the seeded rng: ORDER BY RANDOM() differs on every run
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db_path)
+    acc_nos = np.array([r[0] for r in conn.execute("SELECT Acc_No FROM books ORDER BY Acc_No")], dtype=np.int64)
+    if not len(acc_nos):
+        conn.close()
+        raise RuntimeError(f"No books in {db_path}")
+    picked = rng.choice(acc_nos, size=min(max(per_endpoint, 1), len(acc_nos)), replace=False)
+    rows = {
+        row[0]: row for row in conn.execute(
+            "SELECT Acc_No, ISBN, Title FROM books WHERE Acc_No IN (SELECT value FROM json_each(?))",
+            (json.dumps(picked.tolist()),),
+        )
+    }
+    conn.close()
+    sample = [rows[a] for a in picked.tolist()]
+
+    workload = []
+    for endpoint in endpoints:
+        for i in range(per_endpoint):
+            acc_no, isbn, title = sample[i % len(sample)]
+            words = str(title).split()
+            # Use a word subset so queries are not exact title replays
+            query = " ".join(words[:max(2, len(words) - 1)])
+            if endpoint == "book_by_id":
+                path = f"/books/id/{acc_no}"
+            elif endpoint == "isbn":
+                path = f"/search/isbn?isbn={quote(str(isbn))}"
+            elif endpoint == "title":
+                path = f"/search/title?query={quote(query)}"
+            elif endpoint == "semantic":
+                path = f"/search/semantic?query={quote(query)}"
+            elif endpoint == "unified":
+                path = f"/search/unified?q={quote(query)}"
+            else:
+                raise ValueError(f"Unknown endpoint: {endpoint}")
+            workload.append((endpoint, path))
+
+    order = rng.permutation(len(workload))
+    return [workload[i] for i in order]
+
+
+def run_workload(make_client, workload, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fire `workload` from `concurrency` threads, one client per thread.
+
+    `make_client()` returns a callable `get(path) -> status_code`.
+    Returns ([(endpoint, status, seconds), ...], wall_seconds).
+    """
+    local = threading.local()
+
+    def one(item):
+        endpoint, path = item
+        get = getattr(local, "get", None)
+        if get is None:
+            get = local.get = make_client()
+        start = time.perf_counter()
+        try:
+            status = get(path)
+        except Exception:
+            status = 0
+        return endpoint, status, time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        records = list(pool.map(one, workload))
+    return records, time.perf_counter() - wall_start
+
+
+def summarize(records, wall_seconds):
+    def stats(rows):
+        lat = np.array([r[2] for r in rows]) * 1000.0
+        errors = sum(1 for r in rows if r[1] >= 500 or r[1] == 0)
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "throughput_rps": round(len(rows) / wall_seconds, 2) if wall_seconds else None,
+            "mean_ms": round(float(lat.mean()), 3),
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p95_ms": round(float(np.percentile(lat, 95)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "max_ms": round(float(lat.max()), 3),
+        }
+
+    by_endpoint = {}
+    for r in records:
+        by_endpoint.setdefault(r[0], []).append(r)
+
+    # Per-endpoint throughput is its share of the mixed run, not an isolated run
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "overall": stats(records),
+        "endpoints": {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+    }
+
+# ================== CLIENTS ==================
+
+def inprocess_client_factory(data_dir, encoder):
+    """Drive the FastAPI app in-process through Starlette's TestClient."""
+    os.environ["BOOK_DB_PATH"] = str(Path(data_dir) / "db.sqlite3")
+    os.environ["BOOK_EMBEDDINGS_DIR"] = str(Path(data_dir) / "embeddings")
+
+    from fastapi.testclient import TestClient
+    from API import semantic_engine
+    from API.api import app
+    from benchmarks.encoders import HashingEncoder
+
+    semantic_engine._ensure_loaded(model=HashingEncoder() if encoder == "stub" else None)
+
+    def make_client():
+        client = TestClient(app)
+        return lambda path: client.get(path).status_code
+
+    return make_client
+
+
+def http_client_factory(base_url):
+    import requests
+
+    def make_client():
+        session = requests.Session()
+        return lambda path: session.get(base_url + path, timeout=60).status_code
+
+    return make_client
+
+
+def start_server(data_dir, encoder, port):
+    import requests
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", "--data", str(data_dir),
+         "--port", str(port), "--encoder", encoder],
+        cwd=str(Path(__file__).resolve().parent.parent),
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Benchmark server exited during startup")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("Benchmark server did not become healthy in time")
+
+# ================== MAIN ==================
+
+def run(data_dir, mode="inprocess", encoder="stub", per_endpoint=DEFAULT_REQUESTS,
+        concurrency=DEFAULT_CONCURRENCY, endpoints=ENDPOINTS, url=None, port=8765, seed=DEFAULT_SEED):
+    data_dir = Path(data_dir)
+    workload = build_workload(data_dir / "db.sqlite3", endpoints, per_endpoint, seed)
+
+    proc = None
+    if mode == "inprocess":
+        make_client = inprocess_client_factory(data_dir, encoder)
+    elif url:
+        make_client = http_client_factory(url.rstrip("/"))
+    else:
+        proc = start_server(data_dir, encoder, port)
+        make_client = http_client_factory(f"http://127.0.0.1:{port}")
+
+    try:
+        # Warm-up pass (page cache, SQLite statement cache, lazy imports)
+        run_workload(make_client, workload[:concurrency * 2], concurrency)
+        records, wall = run_workload(make_client, workload, concurrency)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    manifest_path = data_dir / "embeddings" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    return {
+        "mode": mode if not url else "http-external",
+        "encoder": encoder,
+        "concurrency": concurrency,
+        "per_endpoint": per_endpoint,
+        "catalogue": {k: manifest.get(k) for k in ("num_vectors", "num_books", "model_name")},
+        "host": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "platform": platform.platform(),
+        },
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **summarize(records, wall),
+    }
+
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Load-test the API against a synthetic catalogue and report latency percentiles as JSON.",
+        [
+            {'name': '--data', 'kwargs': {'type': str, 'required': True, 'help': 'Directory from benchmarks.synthetic'}},
+            {'name': '--mode', 'kwargs': {'type': str, 'default': 'inprocess', 'choices': ['inprocess', 'http'], 'help': 'Drive the app in-process or over local HTTP'}},
+            {'name': '--url', 'kwargs': {'type': str, 'default': None, 'help': 'Existing server base URL (http mode); default spawns one'}},
+            {'name': '--port', 'kwargs': {'type': int, 'default': 8765, 'help': 'Port for the spawned server'}},
+            {'name': '--encoder', 'kwargs': {'type': str, 'default': 'stub', 'choices': ['stub', 'model'], 'help': 'Query encoder'}},
+            {'name': '--requests', 'kwargs': {'type': int, 'default': DEFAULT_REQUESTS, 'help': 'Requests per endpoint'}},
+            {'name': '--concurrency', 'kwargs': {'type': int, 'default': DEFAULT_CONCURRENCY, 'help': 'Concurrent clients'}},
+            {'name': '--endpoints', 'kwargs': {'type': str, 'default': ",".join(ENDPOINTS), 'help': 'Comma-separated subset of ' + ",".join(ENDPOINTS)}},
+            {'name': '--seed', 'kwargs': {'type': int, 'default': DEFAULT_SEED, 'help': 'Workload RNG seed'}},
+            {'name': '--output', 'kwargs': {'type': str, 'default': None, 'help': 'Write the JSON report here as well as stdout'}},
+        ]
+    )
+    report = run(
+        args.data, args.mode, args.encoder, args.requests, args.concurrency,
+        tuple(e for e in args.endpoints.split(",") if e), args.url, args.port, args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
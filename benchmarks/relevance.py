@@ -0,0 +1,280 @@
+import atexit
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+
+# ================== CONFIG ==================
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = Path(os.getenv("BOOK_DB_PATH", str(BASE_DIR / "Database" / "db.sqlite3")))
+DEFAULT_BASELINE = BASE_DIR / "benchmarks" / "baselines" / "relevance.json"
+
+K_VALUES = (1, 5, 10)
+NDCG_K = 10
+DEFAULT_FROM_DB = 200
+EXCERPT_WORDS = 8               # description words per derived query
+
+# Regression tolerances against the stored baseline
+QUALITY_TOLERANCE = 0.01        # absolute drop allowed in recall / MRR / nDCG
+LATENCY_TOLERANCE = 1.5         # p95 may grow by this factor before failing
+
+STUB_MODEL_NAME = "hashing-stub"
+
+# ================== GOLDEN SET ==================
+
+def load_golden(path):
+    """
+    Golden file format (JSON list):
+        [{"query": "...", "expected": [acc_no, ...], "mode": "semantic" | "title"}, ...]
+    `mode` defaults to "semantic".
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    for item in items:
+        item.setdefault("mode", "semantic")
+        item["expected"] = [int(a) for a in item["expected"]]
+    return items
+
+
+def golden_name(path):
+    """Stable name for a golden file in reports, however the path was typed."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def golden_from_db(db_path, n=DEFAULT_FROM_DB):
+    """
+    Self-retrieval set: each sampled book must retrieve itself from
+    EXCERPT_WORDS words taken from the middle of its description (so the
+    query hits description chunks, possibly across a chunk boundary), or
+    from its title when the description is missing or a placeholder.
+    Sampling is evenly spaced over Acc_No, so the set is identical between
+    runs on the same catalogue.
+    """
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT Acc_No, Title, description FROM books WHERE Title IS NOT NULL ORDER BY Acc_No"
+    ).fetchall()
+    conn.close()
+    if not rows:
+        return []
+
+    step = max(len(rows) // n, 1)
+    items = []
+    for acc_no, title, description in rows[::step][:n]:
+        words = str(description or "").split()
+        if len(words) >= EXCERPT_WORDS:
+            start = len(words) // 3
+            query = " ".join(words[start:start + EXCERPT_WORDS])
+        else:
+            query = str(title)
+        items.append({"query": query, "expected": [int(acc_no)], "mode": "semantic"})
+    return items
+
+# ================== METRICS ==================
+
+def ranked_acc_nos(results):
+    """Collapse chunk-level hits to books, keeping first (best) occurrence."""
+    seen = set()
+    ranked = []
+    for r in results:
+        if r["acc_no"] not in seen:
+            seen.add(r["acc_no"])
+            ranked.append(r["acc_no"])
+    return ranked
+
+
+def score_query(ranked, expected):
+    expected = set(expected)
+    out = {}
+    for k in K_VALUES:
+        out[f"recall@{k}"] = len(expected.intersection(ranked[:k])) / len(expected)
+
+    rr = 0.0
+    for rank, acc_no in enumerate(ranked, 1):
+        if acc_no in expected:
+            rr = 1.0 / rank
+            break
+    out["mrr"] = rr
+
+    dcg = sum(1.0 / math.log2(rank + 1)
+              for rank, acc_no in enumerate(ranked[:NDCG_K], 1) if acc_no in expected)
+    idcg = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(expected), NDCG_K) + 1))
+    out[f"ndcg@{NDCG_K}"] = dcg / idcg if idcg else 0.0
+    return out
+
+# ================== HARNESS ==================
+
+def _load_engine(db_path, embeddings_dir, encoder):
+    """Point the engine at the given artifacts and load it with the chosen encoder."""
+    os.environ["BOOK_DB_PATH"] = str(db_path)
+    os.environ["HF_HUB_OFFLINE"] = "1"  # use the cached model, never the network
+
+    model = None
+    if encoder == "stub":
+        from benchmarks.encoders import HashingEncoder
+        model = HashingEncoder()
+        if embeddings_dir is None:
+            # Stub queries are only meaningful against a stub-encoded index
+            embeddings_dir = Path(tempfile.mkdtemp(prefix="bookfinder-relevance-"))
+            atexit.register(shutil.rmtree, embeddings_dir, True)
+            from scripts.build_embeddings import build_embeddings
+            build_embeddings(model=model, model_name=STUB_MODEL_NAME,
+                             db_path=db_path, out_dir=embeddings_dir)
+
+    if embeddings_dir is not None:
+        os.environ["BOOK_EMBEDDINGS_DIR"] = str(embeddings_dir)
+
+    from API import semantic_engine
+    semantic_engine._ensure_loaded(model=model)
+    return semantic_engine
+
+
+def run(golden, engine):
+    per_query = []
+
+    # Pass 1: latency, untouched by tracemalloc overhead
+    for item in golden:
+        fields = ["title"] if item["mode"] == "title" else None
+        start = time.perf_counter()
+        result = engine.semantic_search(item["query"], allowed_fields=fields)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        ranked = ranked_acc_nos(result["results"])
+        per_query.append({
+            "query": item["query"],
+            "mode": item["mode"],
+            "latency_ms": round(latency_ms, 3),
+            "num_results": len(ranked),
+            "threshold_reduced": result["threshold_reduced"],
+            **score_query(ranked, item["expected"]),
+        })
+
+    # Pass 2: peak Python/NumPy allocation per query
+    tracemalloc.start()
+    for item, row in zip(golden, per_query):
+        fields = ["title"] if item["mode"] == "title" else None
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        engine.semantic_search(item["query"], allowed_fields=fields)
+        row["peak_alloc_kb"] = round((tracemalloc.get_traced_memory()[1] - before) / 1024, 1)
+    tracemalloc.stop()
+
+    return per_query
+
+
+def summarize(per_query):
+    if not per_query:
+        return {}
+    keys = [f"recall@{k}" for k in K_VALUES] + ["mrr", f"ndcg@{NDCG_K}"]
+    lat = np.array([q["latency_ms"] for q in per_query])
+    mem = np.array([q["peak_alloc_kb"] for q in per_query])
+    summary = {k: round(float(np.mean([q[k] for q in per_query])), 4) for k in keys}
+    summary.update({
+        "queries": len(per_query),
+        "latency_p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "latency_p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "latency_mean_ms": round(float(lat.mean()), 3),
+        "peak_alloc_p95_kb": round(float(np.percentile(mem, 95)), 1),
+        "threshold_reduced_rate": round(float(np.mean([q["threshold_reduced"] for q in per_query])), 4),
+    })
+    return summary
+
+
+def compare(summary, baseline):
+    """Return (deltas, regressions) of `summary` against a baseline summary."""
+    deltas, regressions = {}, []
+    for key, value in summary.items():
+        base = baseline.get(key)
+        if not isinstance(base, (int, float)) or key == "queries":
+            continue
+        deltas[key] = round(value - base, 4)
+        if key.startswith(("recall@", "mrr", "ndcg@")) and value < base - QUALITY_TOLERANCE:
+            regressions.append(f"{key}: {base} -> {value}")
+        if key == "latency_p95_ms" and base > 0 and value > base * LATENCY_TOLERANCE:
+            regressions.append(f"{key}: {base} -> {value}")
+    return deltas, regressions
+
+# ================== ENTRY POINT ==================
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Offline relevance (recall@k, MRR, nDCG) and latency regression harness for the semantic engine.",
+        [
+            {'name': '--db', 'kwargs': {'type': str, 'default': str(DEFAULT_DB_PATH), 'help': 'SQLite catalogue'}},
+            {'name': '--embeddings', 'kwargs': {'type': str, 'default': None, 'help': 'Embeddings directory (default: engine default, or a fresh stub index with --encoder stub)'}},
+            {'name': '--encoder', 'kwargs': {'type': str, 'default': 'stub', 'choices': ['stub', 'model'], 'help': 'Deterministic stub encoder or the cached sentence-transformer'}},
+            {'name': '--golden', 'kwargs': {'type': str, 'default': None, 'help': 'Golden query file (e.g. benchmarks/golden/synthetic.json); default derives a self-retrieval set from the DB'}},
+            {'name': '--from_db', 'kwargs': {'type': int, 'default': DEFAULT_FROM_DB, 'help': 'Size of the derived self-retrieval set'}},
+            {'name': '--write_golden', 'kwargs': {'type': str, 'default': None, 'help': 'Save the query set used, to freeze it as a golden file'}},
+            {'name': '--baseline', 'kwargs': {'type': str, 'default': str(DEFAULT_BASELINE), 'help': 'Baseline report to compare against'}},
+            {'name': '--update_baseline', 'kwargs': {'action': 'store_true', 'help': 'Overwrite the baseline with this run'}},
+            {'name': '--output', 'kwargs': {'type': str, 'default': None, 'help': 'Write the full JSON report here'}},
+        ]
+    )
+
+    golden = load_golden(args.golden) if args.golden else golden_from_db(args.db, args.from_db)
+    if not golden:
+        sys.exit("No golden queries to run")
+    if args.write_golden:
+        Path(args.write_golden).write_text(json.dumps(golden, indent=2) + "\n", encoding="utf-8")
+
+    engine = _load_engine(Path(args.db), args.embeddings, args.encoder)
+    per_query = run(golden, engine)
+    summary = summarize(per_query)
+
+    report = {
+        "encoder": args.encoder,
+        "golden": golden_name(args.golden) if args.golden else f"db-self-retrieval:{len(golden)}",
+        "config": {
+            "default_threshold": engine.DEFAULT_THRESHOLD,
+            "min_threshold": engine.MIN_THRESHOLD,
+            "threshold_step": engine.THRESHOLD_STEP,
+        },
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "summary": summary,
+        "queries": per_query,
+    }
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    missing_baseline = None
+    if not args.update_baseline:
+        baseline = None
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline is None:
+            missing_baseline = f"No baseline at {baseline_path}"
+        elif (baseline.get("golden"), baseline.get("encoder")) != (report["golden"], report["encoder"]):
+            # Metrics from another query set or encoder are not comparable
+            missing_baseline = (f"Baseline {baseline_path} was recorded for {baseline.get('golden')} "
+                                f"({baseline.get('encoder')}), not {report['golden']} ({report['encoder']})")
+        else:
+            report["deltas"], regressions = compare(summary, baseline.get("summary", {}))
+            report["regressions"] = regressions
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print(json.dumps({k: v for k, v in report.items() if k != "queries"}, indent=2))
+    if missing_baseline:
+        sys.exit(f"{missing_baseline}: nothing was compared. Record one with --update_baseline.")
+    if regressions:
+        sys.exit(1)
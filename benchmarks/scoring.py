@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+
+# ================== CONFIG ==================
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_SIZES = "10000,100000"
+DEFAULT_BLOCK_ROWS = "0,8192,32768"   # 0 = one block per segment (unblocked baseline)
+DEFAULT_THREADS = "1,2,4"
+DEFAULT_QUERIES = 50
+DEFAULT_SEED = 11
+
+# ================== MEASURE (one catalogue, in-process) ==================
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 3) if values else None
+
+
+def measure(data_dir, block_rows_list, threads_list, num_queries=DEFAULT_QUERIES, seed=DEFAULT_SEED):
+    """
+    Time _score_segments() over every (block rows, threads) combination on
+    one catalogue. Query vectors are random unit vectors, so only scoring is
+    measured: no encoder, no thresholds, no hydration.
+
+    Peak extra memory is the tracemalloc peak of one query (NumPy reports
+    its allocations to tracemalloc), measured in a separate untimed pass.
+    """
+    os.environ["BOOK_EMBEDDINGS_DIR"] = str(Path(data_dir) / "embeddings")
+    from benchmarks.encoders import HashingEncoder, VECTOR_DIM
+    from API import semantic_engine as engine
+
+    engine._ensure_loaded(HashingEncoder())
+    rng = np.random.default_rng(seed)
+    queries = rng.standard_normal((num_queries, VECTOR_DIM), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    floor = min(engine._threshold_schedule()[0])
+    num_vectors = len(engine._acc_nos)
+
+    runs = []
+    for block_rows in block_rows_list:
+        for threads in threads_list:
+            if block_rows == 0 and threads > 1:
+                continue  # a single block per segment cannot be spread over threads
+            engine.SEARCH_BLOCK_ROWS = block_rows or num_vectors
+            engine.SEARCH_THREADS = threads
+            if engine._pool is not None:
+                engine._pool.shutdown()
+                engine._pool = None
+
+            engine._score_segments(queries[0], None, floor)  # warm the page cache and pool
+            timings = []
+            start = time.perf_counter()
+            for query_vec in queries:
+                t0 = time.perf_counter()
+                engine._score_segments(query_vec, None, floor)
+                timings.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - start
+
+            tracemalloc.start()
+            engine._score_segments(queries[0], None, floor)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            runs.append({
+                "block_rows": block_rows,
+                "threads": threads,
+                "qps": round(num_queries / wall, 1),
+                "p50_ms": _percentile(timings, 50),
+                "p95_ms": _percentile(timings, 95),
+                "peak_extra_mb": round(peak / 2**20, 2),
+            })
+
+    return {"num_vectors": num_vectors, "top_k": engine.SEARCH_TOP_K, "runs": runs}
+
+# ================== RUN (many corpus sizes) ==================
+
+def run(sizes, out_root, block_rows_list, threads_list, num_queries=DEFAULT_QUERIES):
+    """
+    Generate (or reuse) a synthetic catalogue per size and measure each one
+    in a fresh interpreter: the engine's paths and arrays are module globals,
+    so one process can only ever load one catalogue.
+    """
+    from benchmarks.synthetic import generate_catalogue
+
+    results = []
+    for size in sizes:
+        data_dir = Path(out_root) / str(size)
+        if not (data_dir / "embeddings" / "manifest.json").exists():
+            generate_catalogue(data_dir, size, neighbours=False)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.scoring", "--data", str(data_dir),
+             "--block_rows", ",".join(map(str, block_rows_list)),
+             "--threads", ",".join(map(str, threads_list)),
+             "--queries", str(num_queries)],
+            cwd=str(BASE_DIR), capture_output=True, text=True, check=True,
+        )
+        # The engine prints progress lines; the report is the last line
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    return {
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "catalogues": results,
+    }
+
+# ================== ENTRY POINT ==================
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Benchmark blocked, multi-threaded vector scoring across corpus sizes.",
+        [
+            {'name': '--sizes', 'kwargs': {'type': str, 'default': DEFAULT_SIZES, 'help': 'Comma-separated chunk counts'}},
+            {'name': '--out', 'kwargs': {'type': str, 'default': 'bench_data/scoring', 'help': 'Where synthetic catalogues are generated'}},
+            {'name': '--data', 'kwargs': {'type': str, 'default': None, 'help': 'Measure one existing catalogue instead of --sizes'}},
+            {'name': '--block_rows', 'kwargs': {'type': str, 'default': DEFAULT_BLOCK_ROWS, 'help': 'Comma-separated block sizes (0 = unblocked)'}},
+            {'name': '--threads', 'kwargs': {'type': str, 'default': DEFAULT_THREADS, 'help': 'Comma-separated thread counts'}},
+            {'name': '--queries', 'kwargs': {'type': int, 'default': DEFAULT_QUERIES, 'help': 'Queries per configuration'}},
+            {'name': '--output', 'kwargs': {'type': str, 'default': None, 'help': 'Write the JSON report here as well'}},
+        ]
+    )
+    block_rows_list = [int(n) for n in args.block_rows.split(",")]
+    threads_list = [int(n) for n in args.threads.split(",")]
+
+    if args.data:
+        print(json.dumps(measure(args.data, block_rows_list, threads_list, args.queries)))
+    else:
+        result = run([int(n) for n in args.sizes.split(",")], args.out,
+                     block_rows_list, threads_list, args.queries)
+        text = json.dumps(result, indent=2)
+        if args.output:
+            Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(text)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+
+# ================== ENTRY POINT ==================
+# Runs the real API app under uvicorn against a given data directory, with
+# the engine loaded up front (optionally with the stub encoder) so the
+# first timed request doesn't pay the load.
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Serve the API over HTTP for load testing.",
+        [
+            {'name': '--data', 'kwargs': {'type': str, 'required': True, 'help': 'Directory from benchmarks.synthetic'}},
+            {'name': '--port', 'kwargs': {'type': int, 'default': 8765, 'help': 'Port to listen on'}},
+            {'name': '--encoder', 'kwargs': {'type': str, 'default': 'stub', 'choices': ['stub', 'model'], 'help': 'Query encoder'}},
+        ]
+    )
+    os.environ["BOOK_DB_PATH"] = os.path.join(args.data, "db.sqlite3")
+    os.environ["BOOK_EMBEDDINGS_DIR"] = os.path.join(args.data, "embeddings")
+
+    import uvicorn
+    from API import semantic_engine
+    from API.api import app
+    from benchmarks.encoders import HashingEncoder
+
+    semantic_engine._ensure_loaded(model=HashingEncoder() if args.encoder == "stub" else None)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+from benchmarks.encoders import HashingEncoder, VECTOR_DIM
+from scripts.build_embeddings import build_attributes, build_neighbours
+
+# ================== CONFIG ==================
+
+DEFAULT_CHUNKS = 10_000
+DEFAULT_CHUNKS_PER_BOOK = 4     # 1 title + 3 description chunks, like the real catalogue
+DEFAULT_SEED = 42
+WRITE_BLOCK = 65_536            # rows of vectors generated per block
+
+WORDS = (
+    "data database systems learning machine deep neural network computer science "
+    "algorithms structures programming python java design analysis theory applied "
+    "statistics probability linear algebra calculus physics chemistry biology genetics "
+    "economics finance management marketing accounting history modern ancient india "
+    "world politics law constitution engineering electrical mechanical civil software "
+    "distributed cloud security cryptography operating compiler graphics vision "
+    "language processing information retrieval mining big web mobile embedded signal "
+    "control robotics optimization numerical methods introduction advanced principles "
+    "fundamentals handbook guide practical essentials concepts applications research"
+).split()
+
+FIRST_NAMES = "Amit Priya Rahul Sneha John Mary David Anita Ravi Kavya Peter Linda".split()
+LAST_NAMES = "Sharma Patel Gupta Rao Smith Brown Kumar Iyer Jones Taylor Mehta Shah".split()
+PUBLISHERS = (
+    "New Delhi: PHI Learning", "Boston: Pearson", "New York: McGraw-Hill",
+    "Sebastopol: O'Reilly", "Cambridge: MIT Press", "New Delhi: Wiley India",
+    "London: Springer", "Oxford: Oxford University Press", "Noida: Cengage",
+)
+
+BOOKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    Acc_Date TEXT,
+    Acc_No INTEGER PRIMARY KEY,
+    Title TEXT,
+    ISBN TEXT,
+    Author_Editor TEXT,
+    Edition_Volume TEXT,
+    Place_Publisher TEXT,
+    Year INTEGER,
+    Pages TEXT,
+    Class_No TEXT,
+    description TEXT,
+    image_url TEXT,
+    book_url TEXT
+)
+"""
+
+FIRST_ACC_NO = 100_000
+
+# ================== GENERATION ==================
+
+def _random_unit_vectors(rng, n: int) -> np.ndarray:
+    block = rng.standard_normal((n, VECTOR_DIM), dtype=np.float32)
+    block /= np.linalg.norm(block, axis=1, keepdims=True)
+    return block
+
+
+def _sentence(rng) -> str:
+    words = rng.choice(WORDS, size=int(rng.integers(6, 12)))
+    return " ".join(words).capitalize() + "."
+
+
+def generate_books(num_books: int, chunks_per_book: int, seed: int = DEFAULT_SEED):
+    """Yield synthetic `books` rows (same column order as Database/SQLite3.py)."""
+    rng = np.random.default_rng(seed)
+    desc_chunks = max(chunks_per_book - 1, 0)
+
+    for i in range(num_books):
+        acc_no = FIRST_ACC_NO + i
+        title = " ".join(rng.choice(WORDS, size=int(rng.integers(2, 6)))).title()
+        author = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        # Two sentences per chunk so chunk_sentences() would re-derive the same count
+        description = " ".join(_sentence(rng) for _ in range(2 * desc_chunks))
+        dewey = f"{int(rng.integers(0, 1000)):03d}.{int(rng.integers(0, 1000)):03d}"
+        yield (
+            f"{int(rng.integers(1, 29)):02d}-{int(rng.integers(1, 13)):02d}-{int(rng.integers(1990, 2025))}",
+            acc_no,
+            title,
+            f"978{int(rng.integers(0, 10**10)):010d}",
+            author,
+            f"{int(rng.integers(1, 6))}th ed.",
+            str(rng.choice(PUBLISHERS)),
+            int(rng.integers(1950, 2025)),
+            str(int(rng.integers(80, 1200))),
+            f"{dewey} {author.split()[-1][:3].upper()}",
+            description,
+            None,
+            None,
+        )
+
+
+def generate_catalogue(out_dir, num_chunks: int = DEFAULT_CHUNKS,
+                       chunks_per_book: int = DEFAULT_CHUNKS_PER_BOOK,
+                       seed: int = DEFAULT_SEED, hashed_titles: bool = True,
+                       neighbours: bool = True) -> dict:
+    """
+    Write `db.sqlite3` and `embeddings/{vectors.npy,metadata.json,attributes.npz,manifest.json}`
+    under `out_dir`, laid out exactly like the real artifacts so the API can
+    be pointed at them with BOOK_DB_PATH / BOOK_EMBEDDINGS_DIR.
+
+    Description vectors are random unit vectors. With `hashed_titles`, title
+    vectors come from HashingEncoder so stub-encoded title queries produce
+    real hits (and exercise hydration) instead of always falling through
+    every threshold.
+
+    Neighbour lists cost O(books^2 * dim); pass `neighbours=False` for the
+    largest sizes when /similar is not being measured.
+    """
+    out_dir = Path(out_dir)
+    emb_dir = out_dir / "embeddings"
+    emb_dir.mkdir(parents=True, exist_ok=True)
+    db_path = out_dir / "db.sqlite3"
+
+    chunks_per_book = max(chunks_per_book, 2)
+    num_books = max(num_chunks // chunks_per_book, 1)
+    num_chunks = num_books * chunks_per_book
+    start = time.perf_counter()
+
+    # ---------- Books table ----------
+    if db_path.exists():
+        db_path.unlink()
+    conn = sqlite3.connect(db_path)
+    conn.execute(BOOKS_SCHEMA)
+    titles = []
+    book_attrs = []
+
+    def rows():
+        for row in generate_books(num_books, chunks_per_book, seed):
+            titles.append(row[2])
+            book_attrs.append((row[1], row[7], row[9], row[6]))
+            yield row
+
+    conn.executemany("INSERT INTO books VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_isbn_norm ON books(REPLACE(ISBN, '-', ''))")
+    conn.commit()
+    conn.close()
+
+    # ---------- Vectors (streamed to disk in blocks) ----------
+    # Same layout as build_embeddings: a title block, then a description block
+    num_titles = num_books
+    segments = {"title": [0, num_titles], "description": [num_titles, num_chunks]}
+    rng = np.random.default_rng(seed + 1)
+    encoder = HashingEncoder() if hashed_titles else None
+    vectors = np.lib.format.open_memmap(
+        emb_dir / "vectors.npy", mode="w+", dtype=np.float32, shape=(num_chunks, VECTOR_DIM)
+    )
+    for r0 in range(0, num_chunks, WRITE_BLOCK):
+        r1 = min(r0 + WRITE_BLOCK, num_chunks)
+        block = _random_unit_vectors(rng, r1 - r0)
+        if encoder is not None and r0 < num_titles:
+            t1 = min(r1, num_titles)
+            block[:t1 - r0] = encoder.encode(titles[r0:t1])
+        vectors[r0:r1] = block
+    vectors.flush()
+    del vectors
+
+    # ---------- Metadata (streamed; text omitted, the engine never reads it) ----------
+    desc_chunks = chunks_per_book - 1
+    with open(emb_dir / "metadata.json", "w", encoding="utf-8") as f:
+        f.write("[")
+        for chunk_id in range(num_chunks):
+            if chunk_id < num_titles:
+                acc_no, field = FIRST_ACC_NO + chunk_id, "title"
+            else:
+                acc_no, field = FIRST_ACC_NO + (chunk_id - num_titles) // desc_chunks, "description"
+            if chunk_id:
+                f.write(",")
+            f.write(json.dumps({"chunk_id": chunk_id, "acc_no": acc_no,
+                                "field": field, "text": ""}))
+        f.write("]")
+
+    # ---------- Filter attributes (aligned with vectors.npy rows) ----------
+    chunk_acc_nos = np.concatenate([
+        FIRST_ACC_NO + np.arange(num_titles),
+        FIRST_ACC_NO + np.arange(num_chunks - num_titles) // desc_chunks,
+    ])
+    np.savez(emb_dir / "attributes.npz", **build_attributes(book_attrs, chunk_acc_nos))
+
+    if neighbours:
+        book_acc_nos, neighbour_lists, neighbour_scores = build_neighbours(
+            np.load(emb_dir / "vectors.npy", mmap_mode="r"), chunk_acc_nos
+        )
+        np.savez(emb_dir / "neighbours.npz", acc_nos=book_acc_nos,
+                 neighbours=neighbour_lists, scores=neighbour_scores)
+
+    manifest = {
+        "model_name": "synthetic",
+        "vector_dim": VECTOR_DIM,
+        "num_vectors": num_chunks,
+        "num_books": num_books,
+        "segments": segments,
+        "seed": seed,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(emb_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    manifest["generate_seconds"] = round(time.perf_counter() - start, 2)
+    return manifest
+
+# ================== ENTRY POINT ==================
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Generate a synthetic books table and matching embedding artifacts.",
+        [
+            {'name': '--out', 'kwargs': {'type': str, 'required': True, 'help': 'Output directory'}},
+            {'name': '--chunks', 'kwargs': {'type': int, 'default': DEFAULT_CHUNKS, 'help': 'Total embedding chunks (10k to 1M)'}},
+            {'name': '--chunks_per_book', 'kwargs': {'type': int, 'default': DEFAULT_CHUNKS_PER_BOOK, 'help': 'Chunks per book (1 title + N-1 description)'}},
+            {'name': '--seed', 'kwargs': {'type': int, 'default': DEFAULT_SEED, 'help': 'RNG seed'}},
+            {'name': '--random_titles', 'kwargs': {'action': 'store_true', 'help': 'Use random title vectors instead of HashingEncoder ones'}},
+            {'name': '--skip_neighbours', 'kwargs': {'action': 'store_true', 'help': 'Skip the O(books^2) neighbour lists'}},
+        ]
+    )
+    info = generate_catalogue(args.out, args.chunks, args.chunks_per_book, args.seed,
+                              hashed_titles=not args.random_titles,
+                              neighbours=not args.skip_neighbours)
+    print(json.dumps(info, indent=2))
@@ -0,0 +1,157 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_helper import setup_cli
+from benchmarks import load_test
+
+# ================== CONFIG ==================
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_WORKER_COUNTS = "1,2,4"
+STARTUP_TIMEOUT = 600   # seconds
+
+# ================== /proc MEMORY ==================
+
+def _children(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid: int) -> dict:
+    """
+    Rss, Pss and private memory of one process, in kB.
+
+    Rss counts shared pages in full for every process. Pss splits each
+    shared page across the processes that map it, so summing Pss over
+    master + workers gives the real footprint of the deployment.
+    """
+    fields = {"Rss": 0, "Pss": 0, "Shared_Clean": 0, "Shared_Dirty": 0,
+              "Private_Clean": 0, "Private_Dirty": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0].rstrip(":") in fields:
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        pass
+    fields["Private"] = fields.pop("Private_Clean") + fields.pop("Private_Dirty")
+    return fields
+
+# ================== RUN ==================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(data_dir, num_workers, encoder, port):
+    env = dict(os.environ)
+    env["BOOK_DB_PATH"] = str(Path(data_dir) / "db.sqlite3")
+    env["BOOK_EMBEDDINGS_DIR"] = str(Path(data_dir) / "embeddings")
+    conf = "benchmarks/gunicorn_stub_conf.py" if encoder == "stub" else "gunicorn_conf.py"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", conf, "-w", str(num_workers),
+         "-b", f"127.0.0.1:{port}", "API.api:app"],
+        cwd=str(BASE_DIR), env=env,
+    )
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        if len(_children(proc.pid)) >= num_workers:
+            try:
+                import requests
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                    return proc
+            except Exception:
+                pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not become ready in time")
+
+
+def measure(data_dir, num_workers, encoder, per_endpoint, concurrency, endpoints):
+    port = _free_port()
+    proc = _start(data_dir, num_workers, encoder, port)
+    try:
+        report = load_test.run(
+            data_dir, mode="http", encoder=encoder, per_endpoint=per_endpoint,
+            concurrency=concurrency, endpoints=endpoints, url=f"http://127.0.0.1:{port}",
+        )
+        # Sampled after load, once every worker has touched the shared data
+        master = memory_kb(proc.pid)
+        worker_mem = [memory_kb(pid) for pid in _children(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    total_pss = master["Pss"] + sum(w["Pss"] for w in worker_mem)
+    return {
+        "workers": num_workers,
+        "throughput_rps": report["overall"]["throughput_rps"],
+        "p50_ms": report["overall"]["p50_ms"],
+        "p95_ms": report["overall"]["p95_ms"],
+        "p99_ms": report["overall"]["p99_ms"],
+        "errors": report["overall"]["errors"],
+        "master_kb": master,
+        "worker_kb": worker_mem,
+        "rss_per_worker_kb": round(sum(w["Rss"] for w in worker_mem) / max(len(worker_mem), 1)),
+        "private_per_worker_kb": round(sum(w["Private"] for w in worker_mem) / max(len(worker_mem), 1)),
+        "total_pss_kb": total_pss,
+    }
+
+
+def run(data_dir, worker_counts, encoder="stub", per_endpoint=200, concurrency=None,
+        endpoints=("semantic", "title", "book_by_id")):
+    rows = []
+    for n in worker_counts:
+        # Keep every worker busy: scale client concurrency with worker count
+        rows.append(measure(data_dir, n, encoder, per_endpoint,
+                            concurrency or max(4 * n, 4), endpoints))
+
+    base = rows[0]
+    for row in rows:
+        scale = row["workers"] / base["workers"]
+        row["throughput_scaling"] = round(row["throughput_rps"] / base["throughput_rps"], 2) if base["throughput_rps"] else None
+        row["scaling_efficiency"] = round(row["throughput_scaling"] / scale, 2) if row["throughput_scaling"] else None
+        row["memory_growth"] = round(row["total_pss_kb"] / base["total_pss_kb"], 2) if base["total_pss_kb"] else None
+
+    return {
+        "encoder": encoder,
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "runs": rows,
+    }
+
+# ================== ENTRY POINT ==================
+
+if __name__ == "__main__":
+    args = setup_cli(
+        "Measure throughput scaling and per-worker memory of pre-forked gunicorn workers.",
+        [
+            {'name': '--data', 'kwargs': {'type': str, 'required': True, 'help': 'Directory from benchmarks.synthetic'}},
+            {'name': '--workers', 'kwargs': {'type': str, 'default': DEFAULT_WORKER_COUNTS, 'help': 'Comma-separated worker counts'}},
+            {'name': '--encoder', 'kwargs': {'type': str, 'default': 'stub', 'choices': ['stub', 'model'], 'help': 'Query encoder'}},
+            {'name': '--requests', 'kwargs': {'type': int, 'default': 200, 'help': 'Requests per endpoint per run'}},
+            {'name': '--concurrency', 'kwargs': {'type': int, 'default': None, 'help': 'Client concurrency (default 4x workers)'}},
+            {'name': '--output', 'kwargs': {'type': str, 'default': None, 'help': 'Write the JSON report here as well'}},
+        ]
+    )
+    result = run(args.data, [int(n) for n in args.workers.split(",")], args.encoder,
+                 args.requests, args.concurrency)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
@@ -0,0 +1,131 @@
+"""
+Typed on-disk format for the catalogue as it moves between pipeline stages.
+
+`Data Gather/ingestion.py` writes the enriched catalogue as Parquet and
+`Database/SQLite3.py` streams it into SQLite batch by batch. CSV is kept
+only as an import/export format: it is read with every column as a string
+and then coerced to the same types, so ISBNs never pass through a float.
+"""
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ================= CONFIG =================
+
+CSV_ENCODING = "latin1"
+ROW_GROUP_SIZE = 10_000      # rows per Parquet row group (the unit of streaming reads)
+DEFAULT_BATCH_SIZE = 5_000
+
+BOOK_SCHEMA = pa.schema([
+    pa.field("Acc_Date", pa.string()),
+    pa.field("Acc_No", pa.int64(), nullable=False),
+    pa.field("Title", pa.string()),
+    pa.field("ISBN", pa.string()),        # keeps leading zeros, 'X' check digits and hyphens
+    pa.field("Author_Editor", pa.string()),
+    pa.field("Edition_Volume", pa.string()),
+    pa.field("Place_Publisher", pa.string()),
+    pa.field("Year", pa.int16()),
+    pa.field("Pages", pa.string()),
+    pa.field("Class_No", pa.string()),
+    pa.field("description", pa.string()),
+    pa.field("image_url", pa.string()),
+    pa.field("book_url", pa.string()),
+])
+BOOK_COLUMNS = BOOK_SCHEMA.names
+
+# Arrow -> pandas nullable dtypes, so a missing Year stays <NA> instead of
+# turning the whole column into float64
+_PANDAS_TYPES = {pa.int16(): pd.Int16Dtype(), pa.int64(): pd.Int64Dtype()}.get
+
+# ================= COERCION =================
+
+def _year(values: pd.Series) -> pd.Series:
+    years = pd.to_numeric(values, errors="coerce")
+    # Free-text years ("c2005", "2005-06"): take the first plausible year
+    text = values.astype("string").str.extract(r"(1[5-9]\d\d|20\d\d)", expand=False)
+    years = years.fillna(pd.to_numeric(text, errors="coerce"))
+    return years.where(years.between(1000, 2100)).round().astype("Int16")
+
+
+def _isbn(values: pd.Series) -> pd.Series:
+    isbns = values.astype("string").str.strip()
+    # CSVs that went through a float column carry a trailing ".0"
+    isbns = isbns.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    return isbns.mask(isbns == "")
+
+
+def coerce_books(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast a books DataFrame to BOOK_SCHEMA's types. Missing catalogue columns
+    are added as nulls; extra columns are kept as strings.
+    """
+    out = {}
+    for name in BOOK_COLUMNS:
+        values = df[name] if name in df.columns else pd.Series(pd.NA, index=df.index)
+        if name == "Acc_No":
+            out[name] = pd.to_numeric(values, errors="coerce").astype("Int64")
+        elif name == "Year":
+            out[name] = _year(values)
+        elif name == "ISBN":
+            out[name] = _isbn(values)
+        else:
+            out[name] = values.astype("string")
+    for name in df.columns:
+        if name not in out:
+            out[name] = df[name].astype("string")
+    return pd.DataFrame(out, index=df.index)
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    df = coerce_books(df)
+    extra = [pa.field(name, pa.string()) for name in df.columns if name not in BOOK_COLUMNS]
+    return pa.Table.from_pandas(df, schema=pa.schema(list(BOOK_SCHEMA) + extra), preserve_index=False)
+
+# ================= READ / WRITE =================
+
+def _read_csv(path, **kwargs):
+    return pd.read_csv(path, encoding=CSV_ENCODING, dtype=str, **kwargs)
+
+
+def read_books(path) -> pd.DataFrame:
+    """Whole catalogue as a typed DataFrame, from .parquet or (import) .csv."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_table(path).to_pandas(types_mapper=_PANDAS_TYPES)
+    return coerce_books(_read_csv(path))
+
+
+def write_books(df: pd.DataFrame, path):
+    """Write .parquet in row groups of ROW_GROUP_SIZE, or export .csv."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pq.write_table(to_arrow(df), path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    else:
+        coerce_books(df).to_csv(path, index=False, encoding=CSV_ENCODING)
+
+
+def iter_book_rows(path, columns=BOOK_COLUMNS, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield lists of row tuples (in `columns` order), `batch_size` rows at a
+    time, ready for executemany(). Parquet is streamed with only `columns`
+    read from disk; CSV is read in chunks and coerced chunk by chunk.
+    Columns absent from the file come back as None.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        parquet = pq.ParquetFile(path)
+        present = [name for name in columns if name in parquet.schema_arrow.names]
+        batches = parquet.iter_batches(batch_size=batch_size, columns=present)
+    else:
+        batches = (batch for chunk in _read_csv(path, chunksize=batch_size)
+                   for batch in to_arrow(chunk).to_batches())
+
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        names = batch.schema.names
+        values = [batch.column(names.index(name)).to_pylist() if name in names
+                  else [None] * batch.num_rows for name in columns]
+        yield list(zip(*values))
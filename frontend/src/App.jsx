@@ -18,7 +18,14 @@ export default function App() {
   const [query, setQuery] = useState("");
   const [mode, setMode] = useState("title");
   const [engineReady, setEngineReady] = useState(null);
+  const [browseBooks, setBrowseBooks] = useState([]);
+  const [browseAfter, setBrowseAfter] = useState(null);
+  const [browseDone, setBrowseDone] = useState(false);
+  const [browseLoading, setBrowseLoading] = useState(false);
   const pollRef = useRef(null);
+  // Cursors already requested, so StrictMode's double-run mount effect
+  // (or a double click) cannot append the same page twice
+  const browseCursorsRef = useRef(new Set());
 
   // Poll engine status until ready
   useEffect(() => {
@@ -40,6 +47,7 @@ export default function App() {
 
   useEffect(() => {
     loadFeaturedBooks();
+    loadMoreBooks();
   }, []);
 
   useEffect(() => {
@@ -70,6 +78,39 @@ export default function App() {
     }
   };
 
+  // Catalogue browsing: slim tiles, one keyset page at a time
+  const loadMoreBooks = async () => {
+    const cursor = browseAfter ?? "start";
+    if (browseCursorsRef.current.has(cursor)) return;
+    browseCursorsRef.current.add(cursor);
+    setBrowseLoading(true);
+    try {
+      const { books, nextAfter } = await api.getBookPage({ after: browseAfter, limit: 24 });
+      setBrowseBooks((prev) => [...prev, ...books.map((b) => ({ ...b, isTile: true }))]);
+      setBrowseAfter(nextAfter);
+      setBrowseDone(nextAfter == null);
+    } catch (err) {
+      browseCursorsRef.current.delete(cursor); // allow a retry
+      console.error("Failed to load catalogue page", err);
+    } finally {
+      setBrowseLoading(false);
+    }
+  };
+
+  // Tiles carry only what the grid renders; fetch the full record for the modal
+  const selectBook = async (book) => {
+    if (!book?.isTile) {
+      setSelectedBook(book);
+      return;
+    }
+    try {
+      const [full] = await api.getBooksByIds([book.Acc_No]);
+      setSelectedBook(full || book);
+    } catch {
+      setSelectedBook(book);
+    }
+  };
+
   const performSearch = async () => {
     setLoading(true);
     setError(null);
@@ -168,11 +209,32 @@ export default function App() {
             ) : null}
           </div>
         )}
+
+        {!searchPerformed && browseBooks.length > 0 && (
+          <div className="featured-section">
+            <div className="section-header">
+              <h2>Browse the Catalogue</h2>
+            </div>
+
+            <BookGrid books={browseBooks} onSelect={selectBook} />
+
+            {!browseDone && (
+              <button
+                className="shuffle-btn"
+                onClick={loadMoreBooks}
+                disabled={browseLoading}
+              >
+                {browseLoading ? "..." : "Load more"}
+              </button>
+            )}
+          </div>
+        )}
       </main>
 
       <BookModal
         book={selectedBook}
         onClose={() => setSelectedBook(null)}
+        onSelect={setSelectedBook}
       />
 
       <footer className="footer">
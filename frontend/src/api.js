@@ -26,6 +26,41 @@ export async function searchISBN(isbn) {
   return res.json();
 }
 
+// Reading lists: many queries in one request. The server streams NDJSON,
+// one line per query; onResult is called with each line as it arrives.
+export async function searchBatch(queries, onResult, options = {}) {
+  const res = await fetch(`${BASE}/search/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ queries, ...options }),
+  });
+  if (!res.ok) throw new Error("Batch search failed");
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) onResult(JSON.parse(line));
+    }
+  }
+  if (buffer.trim()) onResult(JSON.parse(buffer));
+}
+
+export async function getSuggestions(prefix, limit = 8) {
+  const res = await fetch(
+    `${BASE}/suggest?prefix=${encodeURIComponent(prefix)}&limit=${limit}`
+  );
+  if (!res.ok) return [];
+  const json = await res.json();
+  return json.suggestions || [];
+}
+
 export async function getRandomBooks(limit = 8) {
   const res = await fetch(`${BASE}/books/random?limit=${limit}`);
   if (!res.ok) throw new Error("Failed to fetch random books");
@@ -39,6 +74,38 @@ export async function getBookById(accNo) {
   return res.json();
 }
 
+// Many books in one round trip (e.g. hydrating a list of Acc_Nos for the
+// grid). Returned in the order requested; unknown Acc_Nos are skipped.
+export async function getBooksByIds(accNos, projection = "full") {
+  if (!accNos.length) return [];
+  const res = await fetch(`${BASE}/books/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ acc_nos: accNos, projection }),
+  });
+  if (!res.ok) throw new Error("Failed to fetch books");
+  const json = await res.json();
+  return json.data || [];
+}
+
+// One page of the catalogue as slim tiles. Pass the previous page's
+// nextAfter to get the next one; nextAfter is null on the last page.
+export async function getBookPage({ after = null, limit = 100, projection = "tile" } = {}) {
+  const params = new URLSearchParams({ limit, projection });
+  if (after != null) params.set("after", after);
+  const res = await fetch(`${BASE}/books?${params}`);
+  if (!res.ok) throw new Error("Failed to fetch books");
+  const json = await res.json();
+  return { books: json.data || [], nextAfter: json.next_after };
+}
+
+export async function getSimilarBooks(accNo, limit = 6) {
+  const res = await fetch(`${BASE}/books/id/${accNo}/similar?limit=${limit}`);
+  if (!res.ok) return [];
+  const json = await res.json();
+  return json.data || [];
+}
+
 export async function getSearchStatus() {
   const res = await fetch(`${BASE}/search/status`);
   if (!res.ok) return { ready: false, loading: true };
@@ -1,4 +1,22 @@
-export default function BookModal({ book, onClose }) {
+import { useEffect, useState } from "react";
+import { getSimilarBooks } from "../api";
+
+export default function BookModal({ book, onClose, onSelect }) {
+  const [similar, setSimilar] = useState([]);
+  const accNoKey = book?.Acc_No;
+
+  useEffect(() => {
+    setSimilar([]);
+    if (!accNoKey) return;
+    let cancelled = false;
+    getSimilarBooks(accNoKey).then((books) => {
+      if (!cancelled) setSimilar(books);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [accNoKey]);
+
   if (!book) return null;
 
   const title = book.Title || "Untitled";
@@ -90,6 +108,24 @@ export default function BookModal({ book, onClose }) {
             </div>
           </div>
 
+          {similar.length > 0 && (
+            <div className="modal-section" style={{ marginTop: "8px" }}>
+              <label>More Like This</label>
+              {similar.map((item) => (
+                <div
+                  className="evidence-item similar-item"
+                  key={item.Acc_No}
+                  onClick={() => onSelect && onSelect(item)}
+                >
+                  <p>{item.Title}</p>
+                  <small>
+                    {item.Author_Editor || "Unknown"} • {(item.similarity * 100).toFixed(1)}% similar
+                  </small>
+                </div>
+              ))}
+            </div>
+          )}
+
           {bookUrl && (
             <div className="modal-section" style={{ marginTop: "8px" }}>
               <a
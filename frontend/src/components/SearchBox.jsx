@@ -1,8 +1,26 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
+import { getSuggestions } from "../api";
 
 export default function SearchBox({ onQueryChange, onModeChange, initialMode, initialQuery }) {
   const [mode, setMode] = useState(initialMode || "title");
   const [query, setQuery] = useState(initialQuery || "");
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Typeahead from the server's in-memory prefix index (no model work)
+  useEffect(() => {
+    const prefix = query.trim();
+    if (mode === "isbn" || !prefix) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    getSuggestions(prefix).then((items) => {
+      if (!cancelled) setSuggestions(items);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [query, mode]);
 
   const handleModeChange = (newMode) => {
     setMode(newMode);
@@ -41,8 +59,16 @@ export default function SearchBox({ onQueryChange, onModeChange, initialMode, in
         className="search-input"
         placeholder={`Search by ${mode}…`}
         value={query}
+        list="search-suggestions"
         onChange={(e) => handleQueryChange(e.target.value)}
       />
+      <datalist id="search-suggestions">
+        {suggestions.map((s) => (
+          <option key={`${s.kind}:${s.query}`} value={s.query}>
+            {s.text} ({s.kind})
+          </option>
+        ))}
+      </datalist>
     </div>
   );
 }
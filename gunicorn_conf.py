@@ -0,0 +1,72 @@
+"""
+Gunicorn config for multi-worker serving.
+
+    gunicorn -c gunicorn_conf.py API.api:app
+
+The app and the semantic engine are loaded once in the master before any
+worker is forked, so every worker shares one copy of the model weights,
+the metadata arrays and the (mmap'd) embedding matrix via copy-on-write:
+
+- `preload_app` imports API.api in the master.
+- `when_ready` loads the engine and the /suggest prefix index, then `gc.freeze()` moves every object
+  that exists at that point into the permanent generation. The cyclic GC
+  then never walks those objects in a worker, and walking them would
+  write to their headers and un-share the pages.
+- The engine keeps per-chunk metadata in flat NumPy arrays, so lookups
+  don't touch refcounts on millions of small objects.
+- Each worker gets an equal share of the torch intra-op threads and of
+  the vector-scoring threads instead of all of them fighting over every core.
+
+WEB_CONCURRENCY defaults to 1 so the free 512MB Render plan behaves
+exactly as the single uvicorn process did.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+
+def _threads_per_worker(num_workers: int) -> int:
+    configured = os.getenv("TORCH_THREADS_PER_WORKER")
+    if configured:
+        return max(int(configured), 1)
+    return max((os.cpu_count() or 1) // max(num_workers, 1), 1)
+
+
+def _load_engine():
+    from API import semantic_engine
+    semantic_engine._ensure_loaded()
+
+
+def _build_suggest_index():
+    from API import suggest
+    from API.api import DB_PATH
+    suggest.ensure_built(DB_PATH)
+
+
+def when_ready(server):
+    # No query is encoded here: running torch ops in the master would start
+    # its OpenMP pool, which forked children cannot safely reuse.
+    _load_engine()
+    _build_suggest_index()
+    gc.collect()
+    gc.freeze()
+    server.log.info("Semantic engine preloaded; %s objects frozen before fork", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    if not os.getenv("SEARCH_THREADS"):
+        from API import semantic_engine
+        semantic_engine.SEARCH_THREADS = min(_threads_per_worker(server.cfg.workers),
+                                             semantic_engine.MAX_DEFAULT_SEARCH_THREADS)
+    try:
+        import torch
+        torch.set_num_threads(_threads_per_worker(server.cfg.workers))
+    except ImportError:
+        pass
@@ -1,24 +1,45 @@
+import os
 import sqlite3
 import json
 import re
+import sys
+import time
 from pathlib import Path
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from API.utils import parse_year, dewey_code, normalize_publisher, UNKNOWN_CODE
+
 # ================== CONFIG ==================
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH = BASE_DIR / "Database" / "db.sqlite3"
-EMBEDDINGS_DIR = BASE_DIR / "embeddings"
+DB_PATH = Path(os.getenv("BOOK_DB_PATH", str(BASE_DIR / "Database" / "db.sqlite3")))
+EMBEDDINGS_DIR = Path(os.getenv("BOOK_EMBEDDINGS_DIR", str(BASE_DIR / "embeddings")))
 
 VECTORS_PATH = EMBEDDINGS_DIR / "vectors.npy"
 METADATA_PATH = EMBEDDINGS_DIR / "metadata.json"
+MANIFEST_PATH = EMBEDDINGS_DIR / "manifest.json"
+ATTRIBUTES_PATH = EMBEDDINGS_DIR / "attributes.npz"
+NEIGHBOURS_PATH = EMBEDDINGS_DIR / "neighbours.npz"
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 VECTOR_DIM = 384
 
+# Segment order in vectors.npy; each field is one contiguous row block
+FIELDS = ("title", "description")
+
+# "More like this": neighbours kept per book, and the memory budget for one
+# float32 block of the book x book similarity matrix. Kept small: this also
+# runs inside the API's auto-build (semantic_engine._ensure_loaded), on a
+# 512 MB instance with the model already loaded.
+NEIGHBOURS_TOP_N = 20
+NEIGHBOURS_BLOCK_BYTES = 32 * 1024 ** 2
+# Centroids this close are other copies of the same book (the catalogue
+# has one Acc_No per physical copy), not recommendations
+DUPLICATE_SCORE = 0.999
+
 # ================== TEXT UTILITIES ==================
 
 def normalize_text(text: str) -> str:
@@ -40,18 +61,150 @@ def chunk_sentences(sentences, min_sent=2, max_sent=3):
         i += max_sent
     return chunks
 
+# ================== FILTER ATTRIBUTES ==================
+
+def build_attributes(books, chunk_acc_nos):
+    """
+    Per-chunk filter columns, aligned row-for-row with vectors.npy.
+
+    books: iterable of (acc_no, year, class_no, place_publisher)
+    Returns int16 year (0 = unknown), int32 Dewey code (-1 = unknown, see
+    API.utils.dewey_code), int32 publisher id (-1 = unknown) and the
+    publisher vocabulary the ids index into.
+    """
+    publisher_ids = {}
+    book_acc, book_year, book_class, book_pub = [], [], [], []
+    for acc_no, year, class_no, place_publisher in books:
+        publisher = normalize_publisher(place_publisher)
+        book_acc.append(acc_no)
+        book_year.append(parse_year(year))
+        book_class.append(dewey_code(class_no))
+        book_pub.append(publisher_ids.setdefault(publisher, len(publisher_ids)) if publisher else UNKNOWN_CODE)
+
+    book_acc = np.asarray(book_acc, dtype=np.int64)
+    order = np.argsort(book_acc, kind="stable")
+    book_acc = book_acc[order]
+    where = order[np.searchsorted(book_acc, np.asarray(chunk_acc_nos, dtype=np.int64))]
+
+    return {
+        "year": np.asarray(book_year, dtype=np.int16)[where],
+        "class_code": np.asarray(book_class, dtype=np.int32)[where],
+        "publisher_id": np.asarray(book_pub, dtype=np.int32)[where],
+        "publishers": np.asarray(list(publisher_ids), dtype=str),
+    }
+
+# ================== BOOK NEIGHBOURS ==================
+
+def _distinct_neighbours(row, centroids, self_index, top_n):
+    """
+    Indices of the best `top_n` books in `row` (one book's similarities),
+    best first, keeping only the first of each group of near-identical
+    centroids. Over-fetches, and fetches more while copies crowd out
+    distinct books.
+    """
+    fetch = min(4 * top_n + 1, len(row))
+    while True:
+        cand = np.argpartition(row, -fetch)[-fetch:]
+        cand = cand[np.lexsort((cand, -row[cand]))]   # best first, ties by index
+        cand = cand[np.isfinite(row[cand])]
+
+        # Copies of the book itself, then copies of an already-kept neighbour
+        copy_sims = centroids[cand] @ centroids[np.append(cand, self_index)].T
+        keep = []
+        for j in range(len(cand)):
+            if copy_sims[j, -1] >= DUPLICATE_SCORE:
+                continue
+            if keep and copy_sims[j, keep].max() >= DUPLICATE_SCORE:
+                continue
+            keep.append(j)
+            if len(keep) == top_n:
+                break
+
+        if len(keep) == top_n or fetch == len(row):
+            return cand[keep]
+        fetch = min(fetch * 2, len(row))
+
+
+def build_neighbours(vectors, chunk_acc_nos, top_n=NEIGHBOURS_TOP_N,
+                     block_bytes=NEIGHBOURS_BLOCK_BYTES, row_block=65_536):
+    """
+    Per-book top-N neighbour lists for /books/id/{acc_no}/similar.
+
+    Each book is represented by the normalized mean of its chunk vectors.
+    Similarities are computed one block of books at a time, sized so the
+    float32 (block x books) score matrix stays within `block_bytes`; apart
+    from the centroids themselves, working memory is that block plus one
+    row of candidate indices, regardless of catalogue size.
+
+    The catalogue has one Acc_No per physical copy, so copies of the same
+    book (centroids scoring >= DUPLICATE_SCORE against each other) are
+    collapsed: a list never contains a copy of the book itself, and holds
+    one Acc_No per group of copies among its neighbours. `vectors` may be a memmap; it is
+    read in `row_block` slices.
+
+    Returns int32 acc_nos (sorted), int32 neighbours (acc_nos, -1 padded),
+    float16 scores.
+    """
+    acc_nos, inverse = np.unique(np.asarray(chunk_acc_nos, dtype=np.int64), return_inverse=True)
+    num_books = len(acc_nos)
+    dim = vectors.shape[1]
+
+    centroids = np.zeros((num_books, dim), dtype=np.float32)
+    for r0 in range(0, len(vectors), row_block):
+        r1 = min(r0 + row_block, len(vectors))
+        np.add.at(centroids, inverse[r0:r1], np.asarray(vectors[r0:r1], dtype=np.float32))
+    norms = np.sqrt(np.einsum("ij,ij->i", centroids, centroids))[:, None]  # no squared copy
+    centroids /= np.where(norms == 0, 1, norms)
+
+    top_n = min(top_n, max(num_books - 1, 0))
+    neighbours = np.full((num_books, top_n), -1, dtype=np.int32)
+    scores = np.zeros((num_books, top_n), dtype=np.float16)
+    if top_n == 0:
+        return acc_nos.astype(np.int32), neighbours, scores
+
+    # The float32 score block is the only (block x books) allocation:
+    # candidates are selected one row at a time below
+    block = max(1, min(num_books, block_bytes // (num_books * 4)))
+    for b0 in tqdm(range(0, num_books, block), desc="Neighbours"):
+        b1 = min(b0 + block, num_books)
+        sims = centroids[b0:b1] @ centroids.T
+        sims[np.arange(b1 - b0), np.arange(b0, b1)] = -np.inf  # not its own neighbour
+
+        for i in range(b1 - b0):
+            keep = _distinct_neighbours(sims[i], centroids, b0 + i, top_n)
+            neighbours[b0 + i, :len(keep)] = acc_nos[keep]
+            scores[b0 + i, :len(keep)] = sims[i, keep]
+        del sims  # else the next block is allocated while this one is alive
+
+    return acc_nos.astype(np.int32), neighbours, scores
+
 # ================== MAIN PIPELINE ==================
 
-def build_embeddings():
-    print("▶ Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME)
+def build_embeddings(model=None, model_name=MODEL_NAME, db_path=DB_PATH, out_dir=EMBEDDINGS_DIR):
+    """
+    Rebuild the embedding artifacts from the books table.
+
+    `model` / `out_dir` default to the production model and embeddings/;
+    offline tools pass a stub encoder and a scratch directory instead.
+    """
+    out_dir = Path(out_dir)
+    vectors_path = out_dir / VECTORS_PATH.name
+    metadata_path = out_dir / METADATA_PATH.name
+    manifest_path = out_dir / MANIFEST_PATH.name
+    attributes_path = out_dir / ATTRIBUTES_PATH.name
+    neighbours_path = out_dir / NEIGHBOURS_PATH.name
+
+    if model is None:
+        print("▶ Loading embedding model...")
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
 
     print("▶ Connecting to SQLite database...")
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute("""
-        SELECT Acc_No, Title, description
+        SELECT Acc_No, Title, description, Year, Class_No, Place_Publisher
         FROM books
         ORDER BY Acc_No ASC
     """)
@@ -59,33 +212,37 @@ def build_embeddings():
     rows = cursor.fetchall()
     conn.close()
 
-    # ---------- Step 1: Collect all texts + metadata ----------
-    texts = []
-    metadata = []
+    # ---------- Step 1: Collect texts per field ----------
+    # Chunks are grouped into one contiguous block per field (all titles,
+    # then all description chunks) so the engine can score just the
+    # segments a search asks for. Adding a field appends a new block.
+    chunks_by_field = {field: [] for field in FIELDS}
 
     print(f"▶ Preparing {len(rows)} books...")
-    for acc_no, title, description in rows:
+    for acc_no, title, description, *_ in rows:
         if title:
-            text = normalize_text(title)
+            chunks_by_field["title"].append((acc_no, normalize_text(title)))
+
+        if description:
+            sentences = split_sentences(description)
+            for chunk in chunk_sentences(sentences):
+                chunks_by_field["description"].append((acc_no, chunk))
+
+    texts = []
+    metadata = []
+    segments = {}
+    for field in FIELDS:
+        start = len(texts)
+        for acc_no, text in chunks_by_field[field]:
             texts.append(text)
             metadata.append({
                 "chunk_id": len(texts) - 1,
                 "acc_no": acc_no,
-                "field": "title",
+                "field": field,
                 "text": text
             })
-
-        if description:
-            sentences = split_sentences(description)
-            chunks = chunk_sentences(sentences)
-            for chunk in chunks:
-                texts.append(chunk)
-                metadata.append({
-                    "chunk_id": len(texts) - 1,
-                    "acc_no": acc_no,
-                    "field": "description",
-                    "text": chunk
-                })
+        segments[field] = [start, len(texts)]
+    del chunks_by_field
 
     # ---------- Step 2: Batch encode ----------
     print(f"▶ Encoding {len(texts)} text chunks in batches...")
@@ -102,20 +259,49 @@ def build_embeddings():
         raise ValueError("Embedding dimension mismatch")
 
     # ---------- Step 3: Save ----------
-    EMBEDDINGS_DIR.mkdir(exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
 
     print("▶ Writing embedding vectors...")
-    np.save(VECTORS_PATH, vectors)
+    np.save(vectors_path, vectors)
+
+    print("▶ Writing filter attributes...")
+    np.savez(attributes_path, **build_attributes(
+        ((row[0], row[3], row[4], row[5]) for row in rows),
+        [item["acc_no"] for item in metadata],
+    ))
+
+    print("▶ Computing book neighbours...")
+    book_acc_nos, neighbours, neighbour_scores = build_neighbours(
+        vectors, [item["acc_no"] for item in metadata]
+    )
+    np.savez(neighbours_path, acc_nos=book_acc_nos,
+             neighbours=neighbours, scores=neighbour_scores)
 
     print("▶ Writing metadata...")
-    with open(METADATA_PATH, "w", encoding="utf-8") as f:
+    with open(metadata_path, "w", encoding="utf-8") as f:
         json.dump(metadata, f, ensure_ascii=False)
 
+    # Written last: the API derives its cache version (ETags) from this file,
+    # so a rebuild invalidates client caches only once the artifacts are complete.
+    print("▶ Writing manifest...")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "vector_dim": VECTOR_DIM,
+            "num_vectors": int(len(vectors)),
+            "num_books": len(rows),
+            "segments": segments,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }, f, indent=2)
+
     print("✅ Embedding rebuild completed successfully")
     print(f"   Total vectors: {len(vectors)}")
     print(f"   Output:")
-    print(f"     - {VECTORS_PATH}")
-    print(f"     - {METADATA_PATH}")
+    print(f"     - {vectors_path}")
+    print(f"     - {metadata_path}")
+    print(f"     - {attributes_path}")
+    print(f"     - {neighbours_path}")
+    print(f"     - {manifest_path}")
 
 # ================== ENTRY POINT ==================
 
@@ -6,7 +6,7 @@ import time
 # Setup path
 sys.path.append(os.getcwd())
 
-from API.semantic_engine import semantic_search, _ensure_loaded, _vectors, _metadata
+from API.semantic_engine import semantic_search, _ensure_loaded
 
 def test_engine():
     print("Testing Semantic Engine loading...")
@@ -19,9 +19,9 @@ def test_engine():
     print(f"Engine loaded in {duration:.2f} seconds")
     
     # Check data
-    from API.semantic_engine import _vectors, _metadata
+    from API.semantic_engine import _vectors, _acc_nos
     print(f"Vectors shape: {_vectors.shape}")
-    print(f"Metadata count: {len(_metadata)}")
+    print(f"Metadata count: {len(_acc_nos)}")
     
     # Perform search
     print("\nSearching for 'machine learning'...")